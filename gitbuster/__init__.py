@@ -5,65 +5,104 @@
 # License: http://www.gnu.org/licenses/gpl-3.0.txt
 
 __version__ = "2.1b7"
-from PyQt4.QtGui import QApplication, QMessageBox
-from gitbuster.main_window import MainWindow
-from gitbuster.util import is_top_git_directory, select_git_directory
-from gitbuster.conflicts_dialog import ConflictsDialog
-from gfbi_core.util import get_unmerged_files, apply_solutions
+
+# Only the standard library is imported here: PyQt4, GitPython and the
+# gitbuster modules are imported by main(), when they are needed. Importing
+# gitbuster.history_loader for instance doesn't import PyQt4.
+import argparse
 import signal
 import sys
 import os
-import warnings
-import git
-from git import Repo
+
+
+def parse_arguments(argv):
+    """
+        Parses the command line. The branch selection options default to the
+        "Options/branch patterns" and "Options/recent branches" settings.
+    """
+    from PyQt4.QtCore import QSettings, QStringList, QVariant
+
+    parser = argparse.ArgumentParser(
+        description="Python Qt4 frontend for git filter-branch and git "
+                    "cherry-pick.")
+    parser.add_argument("directory", nargs="?",
+                        help="the git repository to open")
+    parser.add_argument("-b", "--branches", action="append", metavar="GLOB",
+                        help="only load the branches matching this glob (for "
+                             "instance 'release/*'), the others are listed "
+                             "and loaded when they are selected. This can be "
+                             "given several times.")
+    parser.add_argument("-r", "--recent", type=int, metavar="N",
+                        help="also load the N most recently committed "
+                             "branches")
+    parser.add_argument("--background", action="store_true",
+                        help="load all the branches in the background instead "
+                             "of loading them when they are displayed")
+    args = parser.parse_args(argv)
+
+    settings = QSettings("majerti", "gitbuster")
+    settings.beginGroup("Options")
+    if args.branches is None:
+        patterns = settings.value("branch patterns",
+                                  QStringList()).toStringList()
+        args.branches = [unicode(pattern) for pattern in patterns] or None
+    if args.recent is None:
+        recent, valid = settings.value("recent branches", QVariant(0)).toInt()
+        args.recent = recent or None
+
+    return args
+
+
+def solve_conflicts(filepath):
+    """
+        Special conflict mode: displays the conflicts of an interrupted
+        rebase and applies the solutions.
+    """
+    from gitbuster.conflicts_dialog import ConflictsDialog
+    from gfbi_core.util import get_unmerged_files, apply_solutions
+
+    os.chdir(filepath)
+    orig_hexsha = open(".git/rebase-merge/head").read().strip()
+    conflict_hexsha = open(".git/rebase-merge/stopped-sha").read().strip()
+    unmerged_files = get_unmerged_files(conflict_hexsha, orig_hexsha,
+                                        filepath)
+    conflicts_dialog = ConflictsDialog(unmerged_files)
+    ret = conflicts_dialog.exec_()
+    if ret:
+        solutions = conflicts_dialog.get_solutions()
+        apply_solutions(solutions)
+        print "Applied your solutions, you can now continue:"
+        print "git rebase --continue"
 
 
 def main():
     " This method launches gitbuster."
+    from PyQt4.QtGui import QApplication
+    from gitbuster.util import is_top_git_directory, select_git_directory
+
     app = QApplication(sys.argv)
+    args = parse_arguments(sys.argv[1:])
 
-    if len(sys.argv) == 2 and is_top_git_directory(sys.argv[1]):
-        filepath = os.path.abspath(sys.argv[1])
+    if args.directory and is_top_git_directory(args.directory):
+        filepath = os.path.abspath(args.directory)
     else:
         filepath = select_git_directory()
 
     if not filepath:
         sys.exit(1)
 
-    test_repo = Repo(filepath)
     if os.path.exists(os.path.join(filepath, ".git/rebase-merge")):
-        # Special conflict mode
-        os.chdir(filepath)
-        orig_hexsha = open(".git/rebase-merge/head").read().strip()
-        conflict_hexsha = open(".git/rebase-merge/stopped-sha").read().strip()
-        unmerged_files = get_unmerged_files(conflict_hexsha, orig_hexsha,
-                                            filepath)
-        conflicts_dialog = ConflictsDialog(unmerged_files)
-        ret = conflicts_dialog.exec_()
-        if ret:
-            solutions = conflicts_dialog.get_solutions()
-            apply_solutions(solutions)
-            print "Applied your solutions, you can now continue:"
-            print "git rebase --continue"
+        solve_conflicts(filepath)
         sys.exit()
 
-    if test_repo.is_dirty():
-        warning_title = "Unclean repository"
-        warning_text = "The chosen repository has unstaged changes. " \
-                       "You should commit or stash them. "\
-                       "Do you want to continue anyway ?"
-        warning_choice = QMessageBox.warning(None, warning_title,
-                                             warning_text,
-                                             "Yes",
-                                             button1Text="No",
-                                             button2Text ="Stash")
-
-        if warning_choice == 1:
-            sys.exit(2)
-        elif warning_choice == 2:
-            test_repo.git.stash()
-
-    window = MainWindow(directory=filepath, debug=True)
+    from gitbuster.main_window import MainWindow
+    # The worktree is checked in the background, see MainWindow.
+    window = MainWindow(directory=filepath, debug=True,
+                        check_dirty=True,
+                        lazy=not args.background,
+                        background=args.background,
+                        branch_patterns=args.branches,
+                        recent_branches=args.recent)
     window.show()
 
     #reroute SIGINT to Qt.
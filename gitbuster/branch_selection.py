@@ -0,0 +1,67 @@
+# branch_selection.py
+# Copyright (C) 2011 Julien Miotte <miotte.julien@gmail.com>
+#
+# This module is part of gitbuster and is released under the GPLv3
+# License: http://www.gnu.org/licenses/gpl-3.0.txt
+#
+
+from fnmatch import fnmatch
+from subprocess import Popen, PIPE
+
+HEADS_PREFIX = "refs/heads/"
+
+
+def select_branches(directory, branches, patterns=None, recent=None,
+                    current_branch=None):
+    """
+        Returns the branches that should get a model, in the order of the
+        given branches. On repositories with thousands of branches, the other
+        branches are only listed until the user selects them.
+
+        Without patterns nor recent count, every branch is selected.
+
+        :param directory:
+            Root directory of the git repository.
+        :param branches:
+            The branches of the repository.
+        :param patterns:
+            A list of globs matched against the names of the branches, for
+            instance "release/*".
+        :param recent:
+            The number of most recently committed branches to select.
+        :param current_branch:
+            The checked out branch, which is always selected.
+    """
+    if not patterns and not recent:
+        return list(branches)
+
+    names = set()
+    if patterns:
+        for branch in branches:
+            for pattern in patterns:
+                if fnmatch(branch.name, pattern):
+                    names.add(branch.name)
+                    break
+
+    if recent:
+        names.update(recent_branch_names(directory, recent))
+
+    if current_branch is not None:
+        names.add(current_branch.name)
+
+    return [branch for branch in branches if branch.name in names]
+
+
+def recent_branch_names(directory, count):
+    """
+        Returns the names of the count branches with the most recent commits.
+        This doesn't read the commits with GitPython, which would cost one
+        object lookup per branch.
+    """
+    command = ["git", "for-each-ref", "--sort=-committerdate",
+               "--count=%d" % count, "--format=%(refname)", "refs/heads"]
+    handle = Popen(command, cwd=directory, stdout=PIPE)
+    output = handle.communicate()[0]
+
+    return [line[len(HEADS_PREFIX):] for line in output.splitlines()
+            if line.startswith(HEADS_PREFIX)]
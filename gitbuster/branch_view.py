@@ -12,16 +12,17 @@ from PyQt4.QtCore import QObject, Qt, SIGNAL
 connect = QObject.connect
 
 from gitbuster.branch_view_ui import Ui_BranchView
+from gitbuster.filter_proxy_model import source_index, source_model
 from gitbuster.util import SetNameAction, DummyRemoveAction, \
-                           custom_resize_columns_to_contents
+                           custom_resize_columns_to_contents, \
+                           set_fixed_row_height
 from gitbuster.q_git_model import NAMES
 
 def to_hide_subset(model, row):
-    columns = model.get_columns()
-    authored_date_col = columns.index('authored_date')
-    author_name_col = columns.index('author_name')
-    message_col = columns.index('message')
-    relevant_columns = [authored_date_col, author_name_col, message_col]
+    schema = model.get_schema()
+    authored_date_col = schema.column('authored_date')
+    author_name_col = schema.column('author_name')
+    message_col = schema.column('message')
 
     role = Qt.EditRole
     this_row_data = (
@@ -37,7 +38,10 @@ def remove_selected_rows(table_view, history_mngr, rows=False):
     if table_view is None:
         return False
 
-    model = table_view.model()
+    # The table view may display the model through a proxy (see
+    # FilterProxyModel): the rows of the model are removed, and the rows of
+    # the view are hidden.
+    model = source_model(table_view.model())
 
     if not rows:
         selected_indexes = [index for index in table_view.selectedIndexes()
@@ -45,14 +49,15 @@ def remove_selected_rows(table_view, history_mngr, rows=False):
 
         ordered_list = []
         deleted_dummies = []
-        for index in selected_indexes:
+        for view_index in selected_indexes:
+            index = source_index(view_index)
             if index.row() not in ordered_list and \
                not model.is_deleted(index) and \
                not model.is_first_commit(index):
                 # Don't delete deleted or first commits.
                 ordered_list.insert(0, index.row())
             if model.is_inserted_commit(index):
-                deleted_dummies.append(index.row())
+                deleted_dummies.append(view_index.row())
 
         if ordered_list:
             model.start_history_event()
@@ -216,6 +221,8 @@ class ButtonLineEdit(QWidget):
                 hide_choice = hide_menu.addAction(name)
                 hide_choices[hide_choice] = model
                 hide_choice.setCheckable(True)
+                # The placeholders of lazy mode have no commits to hide.
+                hide_choice.setEnabled(model.is_populated())
                 if model == self._hidden_from_model:
                     hide_choice.setChecked(True)
 
@@ -303,6 +310,7 @@ class BranchView(QWidget):
         self._parent = parent
 
         self._table_view = QTableView(parent)
+        set_fixed_row_height(self._table_view)
 
         self._name_widget = ButtonLineEdit(model, checkbox, all_models, self)
         self._ui.layout.addWidget(self._name_widget, 0, 0)
@@ -383,7 +391,7 @@ class BranchView(QWidget):
         """
             Show the given column of the table view.
         """
-        column_position = self._model.get_columns().index(column)
+        column_position = self._model.get_schema().column(column)
         self._table_view.showColumn(column_position)
         self.resize_table_view()
 
@@ -391,7 +399,7 @@ class BranchView(QWidget):
         """
             Hide the given column of the table view.
         """
-        column_position = self._model.get_columns().index(column)
+        column_position = self._model.get_schema().column(column)
         self._table_view.hideColumn(column_position)
         self.resize_table_view()
 
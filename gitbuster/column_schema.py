@@ -0,0 +1,101 @@
+# column_schema.py
+# Copyright (C) 2011 Julien Miotte <miotte.julien@gmail.com>
+#
+# This module is part of gitbuster and is released under the GPLv3
+# License: http://www.gnu.org/licenses/gpl-3.0.txt
+#
+
+from gfbi_core import ACTOR_FIELDS, NOT_EDITABLE_FIELDS, TEXT_FIELDS, \
+    TIME_FIELDS
+
+# The kinds of fields, see field_kind().
+TIME_KIND = "time"
+ACTOR_KIND = "actor"
+TEXT_KIND = "text"
+HEXSHA_KIND = "hexsha"
+# The parents, tree and children fields: their values are objects, which are
+# edited as they are.
+OBJECT_KIND = "object"
+OTHER_KIND = "other"
+
+OBJECT_FIELDS = ("parents", "tree", "children")
+
+
+def field_kind(field_name):
+    """
+        Returns the kind of the given field.
+    """
+    if field_name in TIME_FIELDS:
+        return TIME_KIND
+    elif field_name in ACTOR_FIELDS:
+        return ACTOR_KIND
+    elif field_name in TEXT_FIELDS:
+        return TEXT_KIND
+    elif field_name == "hexsha":
+        return HEXSHA_KIND
+    elif field_name in OBJECT_FIELDS:
+        return OBJECT_KIND
+    return OTHER_KIND
+
+
+class ColumnSchema:
+    """
+        Describes the columns of a git model: the field, the kind of field and
+        whether it's editable, by column, and the column of each field.
+
+        The schema is built once per model, so that the per-cell code doesn't
+        search the list of columns nor the lists of fields of gfbi_core.
+    """
+
+    def __init__(self, columns):
+        """
+            :param columns:
+                The fields of the model, as given by GitModel.get_columns().
+        """
+        self._fields = tuple(columns)
+        self._columns = dict((field_name, column)
+                             for column, field_name in enumerate(columns))
+        self._kinds = tuple(field_kind(field_name)
+                            for field_name in columns)
+        self._editable = tuple(field_name not in NOT_EDITABLE_FIELDS
+                               for field_name in columns)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def field(self, column):
+        """
+            Returns the field displayed in the given column.
+        """
+        return self._fields[column]
+
+    def kind(self, column):
+        """
+            Returns the kind of the field displayed in the given column.
+        """
+        return self._kinds[column]
+
+    def column(self, field_name):
+        """
+            Returns the column displaying the given field.
+        """
+        return self._columns[field_name]
+
+    def is_editable(self, column):
+        """
+            Returns True if the field displayed in the given column can be
+            edited.
+        """
+        return self._editable[column]
+
+    def handlers(self, handlers_by_kind, default=None):
+        """
+            Returns a tuple with a handler for each column.
+
+            :param handlers_by_kind:
+                A dict of handlers by kind of field.
+            :param default:
+                The handler of the columns whose kind isn't in the dict.
+        """
+        return tuple(handlers_by_kind.get(kind, default)
+                     for kind in self._kinds)
@@ -0,0 +1,132 @@
+# commit_cache.py
+# Copyright (C) 2011 Julien Miotte <miotte.julien@gmail.com>
+#
+# This module is part of gitbuster and is released under the GPLv3
+# License: http://www.gnu.org/licenses/gpl-3.0.txt
+#
+
+import cPickle
+import os
+
+# The cache is stored in this directory of the .git directory.
+CACHE_DIRECTORY = "gitbuster"
+# The version is in the name of the file, so that changing the format of the
+# records doesn't break older caches.
+CACHE_FILE = "commits-1.cache"
+# The fields of a record, in this order. These are the values read by
+# "git log" in the HistoryLoader, before they are decoded.
+CACHE_FIELDS = ("hexsha", "tree",
+                "author_name", "author_email", "authored_date",
+                "committer_name", "committer_email", "committed_date",
+                "message")
+
+
+class CommitCache:
+    """
+        Keeps the metadata of the commits read from a repository in its .git
+        directory, by hexsha, so that we don't have to read it again the next
+        time the repository is opened.
+
+        Since commits never change, the cache is only appended to: every call
+        to add() pickles a new list of records at the end of the file.
+    """
+
+    def __init__(self, git_dir):
+        """
+            :param git_dir:
+                The .git directory of the repository.
+        """
+        self._path = os.path.join(git_dir, CACHE_DIRECTORY, CACHE_FILE)
+        self._records = None
+
+    def take(self, hexsha):
+        """
+            Returns the cached values of the commit with the given hexsha, as
+            a dict, or None if the commit isn't in the cache.
+
+            The values are forgotten once they have been taken: the commit
+            is kept by the CommitStore from now on.
+        """
+        if self._records is None:
+            self._records = self._read()
+
+        record = self._records.pop(hexsha, None)
+        if record is None:
+            return None
+        return dict(zip(CACHE_FIELDS, record))
+
+    def add(self, values_list):
+        """
+            Appends the given commits to the cache.
+
+            :param values_list:
+                A list of dicts, with the fields listed in CACHE_FIELDS.
+        """
+        if not values_list:
+            return
+
+        records = [tuple(values[field] for field in CACHE_FIELDS)
+                   for values in values_list]
+        data = cPickle.dumps(records, cPickle.HIGHEST_PROTOCOL)
+        try:
+            directory = os.path.dirname(self._path)
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            # One write, so that two processes appending to the cache at
+            # the same time don't mix their records.
+            cache_file = open(self._path, "ab")
+            try:
+                cache_file.write(data)
+            finally:
+                cache_file.close()
+        except (IOError, OSError):
+            # The cache is an optimization, a read-only repository shouldn't
+            # prevent us from working.
+            pass
+
+    def _read(self):
+        """
+            Returns the records of the cache file, by hexsha.
+        """
+        records = {}
+        try:
+            cache_file = open(self._path, "rb")
+        except IOError:
+            return records
+
+        # The offset following the last list read.
+        end = 0
+        try:
+            while True:
+                try:
+                    for record in cPickle.load(cache_file):
+                        records[record[0]] = record
+                except Exception:
+                    # The end of the file, or a truncated or corrupted list
+                    # (which may also raise EOFError).
+                    break
+                end = cache_file.tell()
+            size = os.fstat(cache_file.fileno()).st_size
+        finally:
+            cache_file.close()
+
+        if size > end:
+            # The lists following a corrupted one can't be found anymore,
+            # they'll be read again: the lists added from now on must not be
+            # written after the corrupted one.
+            self._truncate(end)
+        return records
+
+    def _truncate(self, size):
+        """
+            Truncates the cache file to the given size, so that the lists
+            added later follow the last readable list.
+        """
+        try:
+            cache_file = open(self._path, "r+b")
+            try:
+                cache_file.truncate(size)
+            finally:
+                cache_file.close()
+        except (IOError, OSError):
+            pass
@@ -0,0 +1,439 @@
+# commit_store.py
+# Copyright (C) 2011 Julien Miotte <miotte.julien@gmail.com>
+#
+# This module is part of gitbuster and is released under the GPLv3
+# License: http://www.gnu.org/licenses/gpl-3.0.txt
+#
+
+from array import array
+from threading import Lock
+from time import localtime
+import os
+
+from git import Repo, Actor, Commit, Tree
+from git.objects.util import utctz_to_altz
+from gitdb.util import hex_to_bin
+
+from gitbuster.commit_cache import CommitCache
+from gitbuster.trigram_index import TrigramIndex
+from gitbuster.word_index import WordIndex
+
+# The commit stores of the process, by repository, see get_commit_store().
+_STORES = {}
+# The messages are joined in strings of about this length, see StringPool.
+POOL_CHUNK_LENGTH = 1 << 20
+# The length of a binary sha.
+BINSHA_LENGTH = 20
+# The fields that can be read with CommitStore.column().
+COLUMN_FIELDS = ("authored_date", "committed_date", "author_name",
+                 "author_email", "committer_name", "committer_email",
+                 "message")
+
+
+class StringPool:
+    """
+        Stores a lot of strings in a few big strings. Each string is given a
+        position, and is sliced out of its chunk when it's read.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._pending = []
+        self._pending_length = 0
+        self._chunk_indexes = array("l")
+        self._starts = array("l")
+        self._ends = array("l")
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._starts)
+
+    def append(self, value):
+        """
+            Adds a string to the pool and returns its position.
+        """
+        self._lock.acquire()
+        try:
+            position = len(self._starts)
+            self._chunk_indexes.append(len(self._chunks))
+            self._starts.append(self._pending_length)
+            self._pending_length += len(value)
+            self._ends.append(self._pending_length)
+            self._pending.append(value)
+
+            if self._pending_length >= POOL_CHUNK_LENGTH:
+                self._flush()
+            return position
+        finally:
+            self._lock.release()
+
+    def get(self, position):
+        """
+            Returns the string stored at the given position.
+        """
+        chunk_index = self._chunk_indexes[position]
+        if chunk_index == len(self._chunks):
+            # The string is still pending.
+            self.flush()
+
+        return self._chunks[chunk_index][self._starts[position]:
+                                         self._ends[position]]
+
+    def flush(self):
+        """
+            Joins the pending strings in a new chunk.
+        """
+        self._lock.acquire()
+        try:
+            self._flush()
+        finally:
+            self._lock.release()
+
+    def _flush(self):
+        if self._pending:
+            self._chunks.append(u"".join(self._pending))
+            self._pending = []
+            self._pending_length = 0
+
+
+class StoredCommit(Commit):
+    """
+        A commit whose metadata is read from the columns of a CommitStore.
+        These attributes can't be set: the commits are shared by all the
+        models.
+    """
+    __slots__ = ("_store", "_position")
+
+    def __init__(self, repo, binsha, store, position):
+        Commit.__init__(self, repo, binsha, encoding=Commit.default_encoding)
+        self._store = store
+        self._position = position
+
+    @property
+    def tree(self):
+        return Tree(self.repo, self._store.tree_binsha(self._position))
+
+    @property
+    def author(self):
+        return self._store.actors[self._store.authors[self._position]]
+
+    @property
+    def authored_date(self):
+        return self._store.authored_dates[self._position]
+
+    @property
+    def author_tz_offset(self):
+        return self._store.author_tz_offsets[self._position]
+
+    @property
+    def committer(self):
+        return self._store.actors[self._store.committers[self._position]]
+
+    @property
+    def committed_date(self):
+        return self._store.committed_dates[self._position]
+
+    @property
+    def committer_tz_offset(self):
+        return self._store.committer_tz_offsets[self._position]
+
+    @property
+    def message(self):
+        return self._store.messages.get(self._position)
+
+    def get_store(self):
+        """
+            Returns the CommitStore holding the metadata of the commit.
+        """
+        return self._store
+
+    def get_position(self):
+        """
+            Returns the position of the commit in the columns of its store.
+        """
+        return self._position
+
+
+class CommitStore:
+    """
+        Stores every commit read from a repository once, by hexsha.
+
+        The commits of the store are shared by all the models of the
+        repository, and must be considered read-only: the modifications made
+        in the rebase tab are stored by each EditableGitModel, on top of the
+        commits.
+
+        The metadata is stored in columns, one value per commit: typed arrays
+        for the dates and timezone offsets, positions in the actors list for
+        the authors and committers, a StringPool for the messages, and
+        whether the commit is pushed. The commits (see StoredCommit) read
+        their attributes from the columns.
+        There is only one Actor object for every (name, email) couple.
+    """
+
+    def __init__(self, directory="."):
+        """
+            :param directory:
+                Root directory of the git repository.
+        """
+        self._repo = Repo(directory)
+        self._cache = CommitCache(self._repo.git_dir)
+        self._commits = {}
+        self._actor_positions = {}
+        self._strings = {}
+
+        self.trees = array("c")
+        self.authored_dates = array("l")
+        self.author_tz_offsets = array("l")
+        self.committed_dates = array("l")
+        self.committer_tz_offsets = array("l")
+        self.authors = array("l")
+        self.committers = array("l")
+        self.actors = []
+        self.messages = StringPool()
+        # The words and the trigrams of the messages, indexed in the
+        # background, see update_indexes().
+        self.word_index = WordIndex(self.messages)
+        self.message_trigrams = TrigramIndex(self.messages.__len__,
+                                             self.messages.get)
+        # The trigrams of the names and emails of the actors, by actor field
+        # suffix, see actor_trigrams().
+        self._actor_trigrams = {
+            "name": TrigramIndex(self.actors.__len__,
+                                 lambda position: self.actors[position].name),
+            "email": TrigramIndex(self.actors.__len__,
+                                  lambda position: self.actors[position].email)
+        }
+        # 1 if the commit is reachable from a remote reference, see
+        # set_pushed().
+        self.pushed = array("b")
+        self._unpushed = set()
+        # The calendar columns of the date fields, see calendar().
+        self._calendars = {}
+        self._calendar_lock = Lock()
+
+    def __contains__(self, hexsha):
+        return hexsha in self._commits
+
+    def __len__(self):
+        return len(self._commits)
+
+    def get_cache(self):
+        """
+            Returns the on-disk CommitCache of the repository.
+        """
+        return self._cache
+
+    def get(self, hexsha):
+        """
+            Returns the commit with the given hexsha.
+        """
+        return self._commits[hexsha]
+
+    def add(self, values):
+        """
+            Stores a commit built from the given values. If the commit is
+            already in the store, the stored commit is returned.
+
+            :param values:
+                A dict with the hexsha and tree of the commit, the name and
+                email of the author and committer, the authored and committed
+                dates as raw git dates ("timestamp +0100"), and the message.
+        """
+        hexsha = values["hexsha"]
+        if hexsha in self._commits:
+            return self._commits[hexsha]
+
+        authored_date, author_tz = values["authored_date"].split()
+        committed_date, committer_tz = values["committed_date"].split()
+
+        position = len(self.messages)
+        self.trees.fromstring(hex_to_bin(values["tree"]))
+        self.authored_dates.append(int(authored_date))
+        self.author_tz_offsets.append(utctz_to_altz(author_tz))
+        self.committed_dates.append(int(committed_date))
+        self.committer_tz_offsets.append(utctz_to_altz(committer_tz))
+        self.authors.append(self.actor_position(values["author_name"],
+                                                values["author_email"]))
+        self.committers.append(self.actor_position(values["committer_name"],
+                                                   values["committer_email"]))
+        self.pushed.append(0)
+        # The messages are appended last: their length is the number of
+        # complete rows in the columns.
+        self.messages.append(values["message"])
+
+        commit = StoredCommit(self._repo, hex_to_bin(hexsha), self, position)
+        self._commits[hexsha] = commit
+        self._unpushed.add(hexsha)
+        return commit
+
+    def set_parents(self, hexsha, parents):
+        """
+            Sets the parents of a stored commit.
+
+            :param parents:
+                The hexshas of the parents, which must be stored too.
+        """
+        commit = self._commits[hexsha]
+        commit.parents = tuple(self._commits[parent] for parent in parents)
+
+    def column(self, field_name, positions):
+        """
+            Returns the values of a field for the commits at the given
+            positions. The dates are returned as timestamps.
+
+            :param field_name:
+                One of COLUMN_FIELDS.
+            :param positions:
+                The positions of the commits, see StoredCommit.get_position.
+        """
+        if field_name == "authored_date":
+            dates = self.authored_dates
+            return [dates[position] for position in positions]
+        elif field_name == "committed_date":
+            dates = self.committed_dates
+            return [dates[position] for position in positions]
+        elif field_name == "message":
+            get = self.messages.get
+            return [get(position) for position in positions]
+
+        actors = self.actors
+        actor_positions = self.actor_column(field_name)
+        if field_name.endswith("_email"):
+            return [actors[actor_positions[position]].email
+                    for position in positions]
+        return [actors[actor_positions[position]].name
+                for position in positions]
+
+    def calendar(self, field_name):
+        """
+            Returns the local date (as yyyymmdd), weekday (from 1 for monday)
+            and second of the day of a date field, as three arrays indexed by
+            position, like the other columns. They are filled the first time a
+            date filter needs them, and extended with the commits added since.
+
+            :param field_name:
+                "authored_date" or "committed_date".
+        """
+        if field_name == "authored_date":
+            timestamps = self.authored_dates
+        else:
+            timestamps = self.committed_dates
+
+        self._calendar_lock.acquire()
+        try:
+            if field_name not in self._calendars:
+                self._calendars[field_name] = (array("l"), array("b"),
+                                               array("l"))
+            days, weekdays, seconds = self._calendars[field_name]
+
+            # The messages are the last column filled by add().
+            for position in xrange(len(days), len(self.messages)):
+                local_time = localtime(timestamps[position])
+                days.append(local_time.tm_year * 10000 +
+                            local_time.tm_mon * 100 + local_time.tm_mday)
+                weekdays.append(local_time.tm_wday + 1)
+                seconds.append(local_time.tm_hour * 3600 +
+                               local_time.tm_min * 60 + local_time.tm_sec)
+            return days, weekdays, seconds
+        finally:
+            self._calendar_lock.release()
+
+    def actor_column(self, field_name):
+        """
+            Returns the column of the positions in the actors list of the
+            authors or of the committers, for the given actor field.
+        """
+        if field_name.startswith("author"):
+            return self.authors
+        return self.committers
+
+    def actor_trigrams(self, field_name):
+        """
+            Returns the TrigramIndex of the names or of the emails of the
+            actors, for the given actor field. There are few actors: the
+            index is brought up to date when it's returned.
+        """
+        index = self._actor_trigrams[field_name.rsplit("_", 1)[1]]
+        index.update()
+        return index
+
+    def indexes_outdated(self):
+        """
+            Returns True if some messages aren't indexed yet, see
+            update_indexes().
+        """
+        return self.word_index.is_outdated() or \
+               self.message_trigrams.is_outdated()
+
+    def update_indexes(self):
+        """
+            Indexes the words and the trigrams of the messages added since
+            the last call. This is run in the background.
+        """
+        self.word_index.update()
+        self.message_trigrams.update()
+
+    def stop_indexing(self):
+        """
+            Stops a running update_indexes() (when gitbuster is closed).
+        """
+        self.word_index.stop()
+        self.message_trigrams.stop()
+
+    def set_pushed(self, hexshas, pushed=True):
+        """
+            Marks the given stored commits as pushed (reachable from a remote
+            reference) or not.
+        """
+        commits = self._commits
+        value = int(pushed)
+        for hexsha in hexshas:
+            self.pushed[commits[hexsha].get_position()] = value
+            if pushed:
+                self._unpushed.discard(hexsha)
+            else:
+                self._unpushed.add(hexsha)
+
+    def get_unpushed(self):
+        """
+            Returns the hexshas of the stored commits that aren't pushed.
+        """
+        return set(self._unpushed)
+
+    def tree_binsha(self, position):
+        """
+            Returns the binary sha of the tree of the commit at the given
+            position.
+        """
+        start = position * BINSHA_LENGTH
+        return self.trees[start:start + BINSHA_LENGTH].tostring()
+
+    def actor_position(self, name, email):
+        """
+            Returns the position of the shared Actor with the given name and
+            email in the actors list.
+        """
+        key = (name, email)
+        if key not in self._actor_positions:
+            self._actor_positions[key] = len(self.actors)
+            self.actors.append(Actor(self.intern(name), self.intern(email)))
+        return self._actor_positions[key]
+
+    def intern(self, value):
+        """
+            Returns the shared copy of the given string. The builtin intern()
+            doesn't accept unicode strings.
+        """
+        return self._strings.setdefault(value, value)
+
+
+def get_commit_store(directory="."):
+    """
+        Returns the commit store of the given repository, creating it if
+        needed.
+    """
+    key = os.path.realpath(directory)
+    if key not in _STORES:
+        _STORES[key] = CommitStore(directory)
+    return _STORES[key]
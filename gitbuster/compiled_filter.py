@@ -0,0 +1,299 @@
+# compiled_filter.py
+# Copyright (C) 2011 Julien Miotte <miotte.julien@gmail.com>
+#
+# This module is part of gitbuster and is released under the GPLv3
+# License: http://www.gnu.org/licenses/gpl-3.0.txt
+#
+
+from PyQt4.QtCore import QRegExp, QTime, Qt
+from time import localtime
+
+from gitbuster.column_schema import ACTOR_KIND, TEXT_KIND, TIME_KIND
+from gitbuster.trigram_index import pattern_literals
+from gitbuster.word_index import is_word
+
+# The numpy module, imported by _import_numpy when the date filters are first
+# evaluated (it's slow to import), or False if it isn't installed.
+_numpy = None
+
+
+def _import_numpy():
+    """
+        Returns the numpy module, or None if it isn't installed. It's imported
+        on the first call, so that it isn't imported at startup.
+    """
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            # The time filters are evaluated one row at a time.
+            _numpy = False
+    return _numpy or None
+
+
+def _in_range(value, bounds):
+    """
+        Returns 1 if the value is strictly between the (after, before) bounds,
+        0 otherwise. Without one of the bounds (None), the value only has to
+        be on the right side of the other one.
+    """
+    after, before = bounds
+    if after is not None and before is not None:
+        return int(after < value < before)
+    elif after is not None:
+        return int(after < value)
+    return int(value < before)
+
+
+def _range_mask(values, bounds):
+    """
+        Returns the boolean numpy array of the values matching the bounds,
+        see _in_range.
+    """
+    after, before = bounds
+    if after is not None and before is not None:
+        return (after < values) & (values < before)
+    elif after is not None:
+        return after < values
+    return values < before
+
+
+def _bounds(filters, after_name, before_name, convert):
+    """
+        Returns the converted (after, before) values of a pair of filters, or
+        None if none of them is set.
+    """
+    if after_name not in filters and before_name not in filters:
+        return None
+
+    bounds = []
+    for name in (after_name, before_name):
+        if name in filters:
+            bounds.append(convert(filters[name]))
+        else:
+            bounds.append(None)
+    return tuple(bounds)
+
+
+def _date_number(q_date):
+    """
+        Returns the given QDate as yyyymmdd, see CommitStore.calendar.
+    """
+    return q_date.year() * 10000 + q_date.month() * 100 + q_date.day()
+
+
+def _seconds(q_time):
+    """
+        Returns the number of seconds since midnight of the given QTime.
+    """
+    return QTime(0, 0).msecsTo(q_time) / 1000.
+
+
+def regexp_literals(regexp):
+    """
+        Returns strings of 3 characters or more that every text matched by the
+        QRegExp contains, see pattern_literals. Nothing is returned for the
+        case insensitive regexps.
+    """
+    if regexp.caseSensitivity() != Qt.CaseSensitive:
+        return []
+
+    pattern = unicode(regexp.pattern())
+    syntax = regexp.patternSyntax()
+    if syntax == QRegExp.FixedString:
+        return [literal for literal in (pattern, ) if len(literal) >= 3]
+    elif syntax in (QRegExp.RegExp, QRegExp.RegExp2):
+        return pattern_literals(pattern)
+    return []
+
+
+class CompiledFilter:
+    """
+        The filters of a QGitModel (see QGitModel.filter_set), converted once
+        into functions scoring the values of the columns, so that the rows are
+        matched without converting the values to QDateTime nor reading the
+        filters dict for each cell.
+
+        A score function returns 1 for each filter matching the value. A time
+        value matches up to 3 filters: the date, the weekday and the time of
+        day filters. The dates of the stored commits are scored in bulk from
+        the calendar columns of the CommitStore, see score_calendar, and the
+        name/email and message filters use the indexes of the store, see
+        matching_actors and message_candidates.
+    """
+
+    def __init__(self, filters):
+        """
+            :param filters:
+                The filters of the model, by filter name.
+        """
+        # The weekday filters are combo box indexes, from 0 for monday.
+        self._date_bounds = _bounds(filters, "afterDate", "beforeDate",
+                                    _date_number)
+        self._weekday_bounds = _bounds(filters, "afterWeekday",
+                                       "beforeWeekday",
+                                       lambda index: index + 1)
+        self._time_bounds = _bounds(filters, "afterHour", "beforeHour",
+                                    _seconds)
+
+        self._scorers = {}
+        if self._date_bounds or self._weekday_bounds or self._time_bounds:
+            self._scorers[TIME_KIND] = self._score_timestamp
+
+        # The literals of the regexps, see regexp_literals.
+        self._literals = {}
+        for kind, name in ((ACTOR_KIND, "nameEmail"), (TEXT_KIND, "message")):
+            regexp = filters.get(name)
+            if regexp is not None and regexp.isValid():
+                self._scorers[kind] = self._regexp_scorer(regexp)
+                self._literals[kind] = regexp_literals(regexp)
+        # The matching actors, by (store, field name), see matching_actors.
+        self._matching_actors = {}
+
+        # The text of the message filter, if it can be searched in the
+        # WordIndex of the stored commits: a case sensitive pattern made of
+        # word characters only, which matches the messages containing it.
+        self.message_word = None
+        regexp = filters.get("message")
+        if TEXT_KIND in self._scorers and \
+           regexp.caseSensitivity() == Qt.CaseSensitive:
+            pattern = unicode(regexp.pattern())
+            if is_word(pattern):
+                self.message_word = pattern
+
+        self.local_only = "localOnly" in filters
+
+    def _score_timestamp(self, timestamp):
+        """
+            Returns the number of time filters matching the given timestamp,
+            in local time (like QDateTime.setTime_t).
+        """
+        local_time = localtime(timestamp)
+        return self._score_calendar_values(
+                    local_time.tm_year * 10000 + local_time.tm_mon * 100 +
+                    local_time.tm_mday,
+                    local_time.tm_wday + 1,
+                    local_time.tm_hour * 3600 + local_time.tm_min * 60 +
+                    local_time.tm_sec)
+
+    def _score_calendar_values(self, day, weekday, second):
+        """
+            Returns the number of time filters matching a date, given as in
+            the calendar columns.
+        """
+        score = 0
+        if self._date_bounds:
+            score += _in_range(day, self._date_bounds)
+        if self._weekday_bounds:
+            score += _in_range(weekday, self._weekday_bounds)
+        if self._time_bounds:
+            score += _in_range(second, self._time_bounds)
+        return score
+
+    def score_calendar(self, calendar, positions):
+        """
+            Returns the number of time filters matching the dates of the
+            stored commits at the given positions. With numpy, each filter is
+            a comparison of the whole calendar columns.
+
+            :param calendar:
+                The calendar columns of the date field, see
+                CommitStore.calendar.
+            :param positions:
+                The positions of the commits in the store.
+        """
+        days, weekdays, seconds = calendar
+        if not positions:
+            return []
+
+        numpy = _import_numpy()
+        if numpy is None:
+            score = self._score_calendar_values
+            return [score(days[position], weekdays[position],
+                          seconds[position]) for position in positions]
+
+        indexes = numpy.array(positions, dtype=numpy.intp)
+        scores = numpy.zeros(len(positions), dtype=numpy.int8)
+        for bounds, column, dtype in ((self._date_bounds, days, numpy.int_),
+                                      (self._weekday_bounds, weekdays,
+                                       numpy.int8),
+                                      (self._time_bounds, seconds,
+                                       numpy.int_)):
+            if bounds:
+                values = numpy.frombuffer(column, dtype=dtype)[indexes]
+                scores += _range_mask(values, bounds)
+        return scores.tolist()
+
+    def _regexp_scorer(self, regexp):
+        """
+            Returns a function returning 1 if the regexp matches a value.
+        """
+        return lambda value: int(regexp.indexIn(value) != -1)
+
+    def matching_actors(self, store, field_name):
+        """
+            Returns the set of the positions of the actors of the store
+            (see CommitStore.actor_position) whose name, or email for the
+            email fields, matches the name/email filter.
+
+            Each actor is matched once, and only if its trigrams contain the
+            trigrams of the literals of the regexp.
+        """
+        count = len(store.actors)
+        key = (store, field_name)
+        if key in self._matching_actors and \
+           self._matching_actors[key][0] == count:
+            return self._matching_actors[key][1]
+
+        literals = self._literals.get(ACTOR_KIND)
+        if literals:
+            candidates, indexed = store.actor_trigrams(field_name)\
+                                       .search(literals)
+            candidates = [position for position in candidates
+                          if position < count]
+            candidates.extend(xrange(indexed, count))
+        else:
+            candidates = xrange(count)
+
+        score = self._scorers[ACTOR_KIND]
+        attribute = field_name.rsplit("_", 1)[1]
+        actors = store.actors
+        matching = set(position for position in candidates
+                       if score(getattr(actors[position], attribute)))
+        self._matching_actors[key] = (count, matching)
+        return matching
+
+    def message_candidates(self, store):
+        """
+            Returns the positions of the stored messages that may match the
+            message filter, found with the indexes of the store:
+
+                candidates, indexed_count, exact
+
+            Only the messages below indexed_count are indexed. If exact is
+            True, the candidates match for sure (see message_word), otherwise
+            they contain the literals of the regexp (see regexp_literals) and
+            must be matched by the regexp.
+
+            None is returned if the indexes can't be used: every message must
+            be matched by the regexp.
+        """
+        if self.message_word is not None:
+            word_index = store.word_index
+            indexed = word_index.indexed_count()
+            return word_index.search(self.message_word), indexed, True
+
+        literals = self._literals.get(TEXT_KIND)
+        if literals:
+            candidates, indexed = store.message_trigrams.search(literals)
+            return candidates, indexed, False
+        return None
+
+    def scorer(self, kind):
+        """
+            Returns the function scoring the values of the given kind of
+            field, or None if no filter applies to them.
+        """
+        return self._scorers.get(kind)
@@ -8,6 +8,7 @@
 from PyQt4.QtCore import QString, Qt
 from PyQt4.QtGui import QCheckBox, QDialog, QLabel
 from gitbuster.confirm_dialog_ui import Ui_Dialog
+from gitbuster.profiler import TRACER
 from gitbuster.util import run_long_operation
 
 
@@ -25,11 +26,13 @@ class ConfirmDialog(QDialog):
         for model in models:
             branch_name = model.get_new_branch_name() or \
                           model.get_current_branch().name
-            mod_count = model.get_modified_count()
-            del_count = model.get_deleted_count()
-            to_rewrite = run_long_operation("Calculating dependencies",
-                                            model.get_to_rewrite_count,
-                                            parent=self)
+            with TRACER.span("get_modified_count", branch=branch_name):
+                mod_count = model.get_modified_count()
+                del_count = model.get_deleted_count()
+            with TRACER.span("get_to_rewrite_count", branch=branch_name):
+                to_rewrite = run_long_operation("Calculating dependencies",
+                                                model.get_to_rewrite_count,
+                                                parent=self)
             is_name_modified = model.is_name_modified()
 
             display_string = ""
@@ -5,13 +5,18 @@
 # License: http://www.gnu.org/licenses/gpl-3.0.txt
 #
 
-from PyQt4.QtCore import QDateTime, QObject, Qt, SIGNAL, QRegExp
+from PyQt4.QtCore import QDateTime, QObject, Qt, QTimer, SIGNAL, QRegExp, \
+    QVariant
 from PyQt4.QtGui import QApplication, QCheckBox, QSizePolicy, QSpacerItem
 
+from gitbuster.filter_proxy_model import FilterProxyModel
 from gitbuster.q_git_delegate import QGitDelegate
 from gitbuster.q_git_model import NAMES
-from gitbuster.util import _connect_button, custom_resize_columns_to_contents
+from gitbuster.util import _connect_button, custom_resize_columns_to_contents,\
+                           set_fixed_row_height, PLACEHOLDER_FONT, \
+                           PLACEHOLDER_TOOLTIP
 from gitbuster.branch_view import remove_selected_rows
+from gitbuster.trigram_index import pattern_narrows
 
 from datetime import datetime
 
@@ -56,6 +61,37 @@ _DATE_FILTERS = frozenset([frozenset(["after%s" % word, "before%s" % word])
 
 _SIMPLE_FILTERS = frozenset(["nameEmail", "message", "localOnly"])
 
+# The filters whose value is a regexp typed in a line edit.
+_TEXT_FILTERS = ("nameEmail", "message")
+# The filters are applied once the text of their line edit hasn't been edited
+# for this delay, in milliseconds.
+LIVE_FILTER_DELAY = 300
+
+
+def filters_narrow(previous, values):
+    """
+        Returns True if the filters with the given values only match rows
+        matched by the filters with the previous values: the same filters are
+        checked, and the changed text filters are plain texts containing the
+        previous ones (the user typed more characters).
+
+        :param previous:
+            The values of the previous filters, by filter name, or None if
+            no filters were applied.
+        :param values:
+            The values of the new filters, by filter name.
+    """
+    if previous is None or set(previous) != set(values):
+        return False
+
+    for name, value in values.items():
+        if value == previous[name]:
+            continue
+        if name not in _TEXT_FILTERS or \
+           not pattern_narrows(previous[name], value):
+            return False
+    return True
+
 
 class FilterMainClass():
 
@@ -79,6 +115,20 @@ class FilterMainClass():
         self._shown_columns = []
         self._checkboxes = {}
         self._model = None
+        self._total_filter_score = 0
+        # The values of the filters applied last, by filter name, and the
+        # columns they were applied on, see narrows().
+        self._applied_filters = None
+        self._applied_columns = None
+
+        self._live_filter_timer = QTimer(self._parent)
+        self._live_filter_timer.setSingleShot(True)
+        self._live_filter_timer.setInterval(LIVE_FILTER_DELAY)
+        # The rows that don't match the filters are filtered out by this
+        # proxy, instead of being hidden one by one in the table view.
+        self._proxy_model = FilterProxyModel(self.gui.tableView)
+        self.gui.tableView.setModel(self._proxy_model)
+        set_fixed_row_height(self.gui.tableView)
 
         self.reset_interface(models)
 
@@ -101,7 +151,7 @@ class FilterMainClass():
 
         self._models = models
         self._model = self._models[current_branch]
-        self.gui.tableView.setModel(self._model)
+        self.set_view_model(self._model)
         self.gui.tableView.verticalHeader().hide()
         self.gui.tableView.setItemDelegate(QGitDelegate(self.gui.tableView))
         custom_resize_columns_to_contents(self.gui.tableView)
@@ -111,21 +161,98 @@ class FilterMainClass():
         self.create_checkboxes()
 
         index = 0
+        # Adding items would select (and therefore populate) the first branch.
+        self.gui.currentBranchComboBox.blockSignals(True)
         self.gui.currentBranchComboBox.clear()
 
-        for branch in self._models:
-            self.gui.currentBranchComboBox.addItem("%s" % str(branch))
+        for branch, model in self._models.items():
+            self._add_branch_item(branch, model)
             if branch == current_branch:
                 current_index = index
             index += 1
+
+        for branch in self._parent.get_unloaded_branches():
+            self._add_branch_item(branch, None)
+
         self.gui.currentBranchComboBox.setCurrentIndex(current_index)
+        self.gui.currentBranchComboBox.blockSignals(False)
+
+    def set_unloaded_branches(self, branches):
+        """
+            Lists the given branches, which don't have a model yet, instead of
+            the previous ones.
+        """
+        combo_box = self.gui.currentBranchComboBox
+        combo_box.blockSignals(True)
+        for index in reversed(xrange(combo_box.count())):
+            if combo_box.itemData(index, Qt.UserRole).toBool():
+                combo_box.removeItem(index)
+
+        for branch in branches:
+            self._add_branch_item(branch, None)
+        combo_box.blockSignals(False)
+
+    def _add_branch_item(self, branch, model):
+        """
+            Adds the branch to the currentBranchComboBox. The branches whose
+            model isn't populated yet are displayed as placeholders.
+
+            :param model:
+                The model of the branch, or None if the branch wasn't selected
+                at startup (see MainWindow.select_branches). The model will be
+                created when the branch is selected.
+        """
+        combo_box = self.gui.currentBranchComboBox
+        combo_box.addItem("%s" % branch.name)
+        index = combo_box.count() - 1
+
+        if model is None:
+            combo_box.setItemData(index, QVariant(True), Qt.UserRole)
+
+        if model is None or not model.is_populated():
+            combo_box.setItemData(index, QVariant(PLACEHOLDER_FONT),
+                                  Qt.FontRole)
+            combo_box.setItemData(index, QVariant(PLACEHOLDER_TOOLTIP),
+                                  Qt.ToolTipRole)
 
     def add_new_model(self, model):
         """
             Add a new model to this tab.
         """
         branch = model.get_current_branch() or model.get_remote_ref()
-        self.gui.currentBranchComboBox.addItem("%s" % branch.name)
+        self._add_branch_item(branch, model)
+
+    def set_view_model(self, model):
+        """
+            Displays the given model in the table view, through the filter
+            proxy. The filters are set on the new model too.
+        """
+        self._proxy_model.setSourceModel(model)
+        self._applied_filters = None
+        self.apply_filters()
+
+    def view_model(self):
+        """
+            Returns the model displayed in the table view (the source model of
+            the filter proxy).
+        """
+        return self._proxy_model.sourceModel()
+
+    def model_populated(self, model):
+        """
+            The given model has been populated, its placeholder is replaced by
+            a regular item.
+        """
+        branch = model.get_current_branch() or model.get_remote_ref()
+        combo_box = self.gui.currentBranchComboBox
+        index = combo_box.findText(branch.name)
+        if index != -1:
+            combo_box.setItemData(index, QVariant(), Qt.FontRole)
+            combo_box.setItemData(index, QVariant(), Qt.ToolTipRole)
+
+        if model == self._model:
+            custom_resize_columns_to_contents(self.gui.tableView)
+            self.gui.tableView.horizontalHeader().setStretchLastSection(True)
 
     def remove_model(self, model):
         """
@@ -162,6 +289,14 @@ class FilterMainClass():
                 widget = getattr(self.gui, widgetname)
                 connect(widget, SIGNAL(signal), self.apply_filters)
 
+        # Apply the text filters while they are typed.
+        connect(self._live_filter_timer, SIGNAL("timeout()"),
+                self.apply_filters)
+        for name in _TEXT_FILTERS:
+            widget = getattr(self.gui, "%sFilterLineEdit" % name)
+            connect(widget, SIGNAL("textEdited(const QString&)"),
+                    lambda text, name=name: self.filter_text_edited(name))
+
         # Connecting the re-order push button to the re-order method.
         _connect_button(self.gui.reOrderPushButton, self.reorder_pushed)
 
@@ -232,7 +367,7 @@ class FilterMainClass():
             When a "display option" is checked or unchecked, we set the display
             options on the model.
         """
-        model = self.gui.tableView.model()
+        model = self.view_model()
         for option_name in AVAILABLE_OPTIONS:
             if self._checkboxes[option_name].isChecked():
                 model.enable_option(option_name)
@@ -291,7 +426,7 @@ class FilterMainClass():
         min_time = datetime(2000, 1, 1, q_min_time.hour(),
                             q_min_time.minute(), q_min_time.second())
 
-        model = self.gui.tableView.model()
+        model = self.view_model()
         model.reorder_commits((min_date, max_date),
                               ((min_time, max_time),),
                               weekdays)
@@ -301,14 +436,24 @@ class FilterMainClass():
             When the currentBranchComboBox current index is changed, set the
             current branch of the model to the new branch.
         """
+        combo_box = self.gui.currentBranchComboBox
+        index = combo_box.currentIndex()
+        if combo_box.itemData(index, Qt.UserRole).toBool():
+            # This branch has no model yet.
+            branch = [branch for branch in self._parent.get_unloaded_branches()
+                      if new_branch_name == branch.name][0]
+            combo_box.setItemData(index, QVariant(), Qt.UserRole)
+            model = self._parent.load_branch(branch)
+
         for branch, model in self._models.items():
             if new_branch_name == branch.name:
+                self._parent.populate_model(model)
                 self._model = model
                 if self._parent._modifications_shown:
-                    self.gui.tableView.setModel(model)
+                    self.set_view_model(model)
                 else:
                     orig_model = model.get_orig_q_git_model()
-                    self.gui.tableView.setModel(orig_model)
+                    self.set_view_model(orig_model)
                 self.refresh_checkboxes()
                 break
 
@@ -317,25 +462,37 @@ class FilterMainClass():
             When the "merge checkbox" is checked or unchecked, pass on the
             option to the model.
         """
-        model = self.gui.tableView.model()
+        model = self.view_model()
         model.setMerge(check_state == Qt.Checked)
 
+    def filter_text_edited(self, name):
+        """
+            When the text of a filter line edit is edited, the filters are
+            applied once the user stops typing (if the filter is checked).
+        """
+        if self._filterbox_byname(name).checkState() == Qt.Checked:
+            self._live_filter_timer.start()
+
     def apply_filters(self):
         """
             When a "filter checkbox" is checked or unchecked, set the filters
-            on the model and reset it.
+            on the model and repaint the rows whose matches changed.
         """
-        table_view = self.gui.tableView
-        model = table_view.model()
+        self._live_filter_timer.stop()
+        model = self.view_model()
 
         filters = set()
+        values = {}
         for checkbox_name in self._filters_values:
             checkbox = self._filterbox_byname(checkbox_name)
 
             if checkbox.checkState() == Qt.Checked:
                 _filter = self._filter_byname(checkbox_name)
-                if checkbox_name in ("message", "nameEmail"):
+                if checkbox_name in _TEXT_FILTERS:
+                    values[checkbox_name] = unicode(_filter)
                     _filter = QRegExp(_filter)
+                else:
+                    values[checkbox_name] = _filter
                 model.filter_set(checkbox_name, _filter)
                 filters.add(checkbox_name)
             else:
@@ -348,20 +505,36 @@ class FilterMainClass():
             if group & filters)\
             +len(filters & _SIMPLE_FILTERS)
 
-        for row in xrange(model.rowCount()):
-            table_view.showRow(row)
+        self._total_filter_score = total_filter_score
+        narrowing = self.narrows(values)
+        self._applied_filters = values
+        self._applied_columns = list(self._shown_columns)
+        self.filter_rows(narrowing)
 
-        if total_filter_score:
-            for row in xrange(model.rowCount()):
-                score = 0
-                for column in self._shown_columns:
-                    index = model.createIndex(row, column)
-                    score += model.filter_score(index)
+        # The matching cells are painted in red, see QGitModel.render_state.
+        model.refresh_render_states()
 
-                if score < total_filter_score:
-                    table_view.hideRow(row)
+    def filter_rows(self, narrowing=False):
+        """
+            Filters the rows of the table view, according to the filters set
+            by apply_filters(). The rows fetched later by the table view (see
+            QGitModel.fetchMore) are filtered by the proxy too.
 
-        table_view.reset()
+            :param narrowing:
+                True if only the rows matching the previous filters must be
+                matched again, see narrows().
+        """
+        self._proxy_model.set_filter(self._shown_columns,
+                                     self._total_filter_score, narrowing)
+
+    def narrows(self, values):
+        """
+            Returns True if the filters with the given values only match rows
+            matched by the filters applied last, on the same columns, see
+            filters_narrow.
+        """
+        return self._applied_columns == self._shown_columns and \
+               filters_narrow(self._applied_filters, values)
 
     def _filterbox_byname(self, name):
         """
@@ -385,29 +558,42 @@ class FilterMainClass():
             Hide all the fake models.
         """
         if [True for model in self._models.values() if model.is_fake_model()]:
-            comboBox = self.gui.currentBranchComboBox
-            previously_selected_index = comboBox.currentIndex()
-            comboBox.clear()
-            for branch, model in self._models.items():
-                if not model.is_fake_model():
-                    comboBox.addItem("%s" % branch.name)
-
+            self._fill_branch_combo_box(show_fake_models=False)
             if self._model.is_fake_model():
-                comboBox.setCurrentIndex(0)
-            else:
-                comboBox.setCurrentIndex(previously_selected_index)
+                # The first branch is displayed instead.
+                self.current_branch_changed(
+                            self.gui.currentBranchComboBox.currentText())
 
     def show_fake_models(self):
         """
             Show all fake models.
         """
         if [True for model in self._models.values() if model.is_fake_model()]:
-            comboBox = self.gui.currentBranchComboBox
-            previously_selected_index = comboBox.currentIndex()
-            comboBox.clear()
-            for branch, model in self._models.items():
-                comboBox.addItem("%s" % branch.name)
-            comboBox.setCurrentIndex(previously_selected_index)
+            self._fill_branch_combo_box(show_fake_models=True)
+
+    def _fill_branch_combo_box(self, show_fake_models):
+        """
+            Lists the branches in the currentBranchComboBox again, like
+            reset_interface does, and selects the branch of the current model
+            (or the first branch if it's hidden). The signals are blocked, so
+            that no branch is populated.
+        """
+        combo_box = self.gui.currentBranchComboBox
+        combo_box.blockSignals(True)
+        combo_box.clear()
+
+        current_index = 0
+        for branch, model in self._models.items():
+            if show_fake_models or not model.is_fake_model():
+                if model is self._model:
+                    current_index = combo_box.count()
+                self._add_branch_item(branch, model)
+
+        for branch in self._parent.get_unloaded_branches():
+            self._add_branch_item(branch, None)
+
+        combo_box.setCurrentIndex(current_index)
+        combo_box.blockSignals(False)
 
     def toggle_modifications(self, show_modifications):
         """
@@ -415,14 +601,14 @@ class FilterMainClass():
             displayed model.
         """
         if show_modifications:
-            self.gui.tableView.setModel(self._model)
+            self.set_view_model(self._model)
             self.show_fake_models()
         else:
             self.hide_fake_models()
             # if the displayed model is not a fake model nor a QGitModel
             if hasattr(self._model, 'get_orig_q_git_model'):
                 orig_model = self._model.get_orig_q_git_model()
-                self.gui.tableView.setModel(orig_model)
+                self.set_view_model(orig_model)
 
     def remove_rows(self):
         """
@@ -0,0 +1,149 @@
+# filter_proxy_model.py
+# Copyright (C) 2011 Julien Miotte <miotte.julien@gmail.com>
+#
+# This module is part of gitbuster and is released under the GPLv3
+# License: http://www.gnu.org/licenses/gpl-3.0.txt
+#
+
+from PyQt4.QtCore import SIGNAL
+from PyQt4.QtGui import QAbstractProxyModel, QSortFilterProxyModel
+
+
+def source_model(model):
+    """
+        Returns the model displayed through the given proxy model, or the
+        model itself if it isn't a proxy.
+    """
+    if isinstance(model, QAbstractProxyModel):
+        return model.sourceModel()
+    return model
+
+
+def source_index(index):
+    """
+        Returns the index of the source model matching the given index of a
+        proxy model, or the index itself if it isn't an index of a proxy.
+    """
+    model = index.model()
+    if isinstance(model, QAbstractProxyModel):
+        return model.mapToSource(index)
+    return index
+
+
+class FilterProxyModel(QSortFilterProxyModel):
+    """
+        Displays the rows of a QGitModel matching the filters of the filter
+        tab. This replaces hiding the rows of the table view one by one, which
+        is slow on big histories.
+
+        The rows are matched all at once by QGitModel.match_rows, with the
+        compiled filters of the model. The accepted rows are cached until
+        the rows of the source model change. When the new filters can only
+        reject more rows (see set_filter), only the accepted rows and the
+        rows whose data changed since are matched again.
+    """
+
+    def __init__(self, parent=None):
+        QSortFilterProxyModel.__init__(self, parent)
+        # The source rows are never sorted, and only filtered again when
+        # the filters change (like the hidden rows were).
+        self.setDynamicSortFilter(False)
+        self._columns = []
+        self._total_score = 0
+        self._accepted = {}
+        # The rows whose data changed since the last filtering.
+        self._changed_rows = set()
+
+    def setSourceModel(self, model):
+        """
+            Displays the given model. The accepted rows are computed again.
+        """
+        previous_model = self.sourceModel()
+        signals = ("rowsAboutToBeInserted(const QModelIndex&, int, int)",
+                   "rowsAboutToBeRemoved(const QModelIndex&, int, int)",
+                   "modelAboutToBeReset()")
+        for signal in signals:
+            if previous_model is not None:
+                self.disconnect(previous_model, SIGNAL(signal),
+                                self.clear_accepted)
+            self.connect(model, SIGNAL(signal), self.clear_accepted)
+
+        signal = SIGNAL("dataChanged(const QModelIndex&, const QModelIndex&)")
+        if previous_model is not None:
+            self.disconnect(previous_model, signal, self.source_data_changed)
+        self.connect(model, signal, self.source_data_changed)
+
+        self.clear_accepted()
+        QSortFilterProxyModel.setSourceModel(self, model)
+
+    def set_filter(self, columns, total_score, narrowing=False):
+        """
+            Filters the rows again. The view is told once that the layout
+            changed, rather than about each range of removed or inserted rows.
+
+            :param columns:
+                The columns whose scores are added.
+            :param total_score:
+                The score a row must reach to be displayed, or 0 to display
+                every row.
+            :param narrowing:
+                True if the new filters only match rows matched by the
+                previous ones (for instance, characters were appended to a
+                text filter). The rows rejected by the previous filters are
+                rejected without being matched again.
+        """
+        self._columns = list(columns)
+        self._total_score = total_score
+
+        if narrowing and total_score:
+            accepted = dict.fromkeys(self._accepted, False)
+            rows = [row for row, match in self._accepted.iteritems()
+                    if match or row in self._changed_rows]
+            rows.sort()
+            matches = self.sourceModel().match_rows(self._columns,
+                                                    total_score, rows)
+            accepted.update(zip(rows, matches))
+            self._accepted = accepted
+        else:
+            self._accepted = {}
+        self._changed_rows = set()
+        self.invalidate()
+
+    def clear_accepted(self, *args):
+        """
+            Forgets the accepted rows, because the rows of the source model
+            are about to move.
+        """
+        self._accepted = {}
+        self._changed_rows = set()
+
+    def source_data_changed(self, top_left, bottom_right):
+        """
+            Remembers the rows whose data changed: they must be matched again
+            by the next narrowing filters, see set_filter.
+        """
+        self._changed_rows.update(xrange(top_left.row(),
+                                         bottom_right.row() + 1))
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        """
+            Returns True if the given row of the source model matches the
+            filters (qt proxy model method).
+        """
+        if not self._total_score:
+            return True
+
+        if source_row not in self._accepted:
+            self._match_rows(source_row)
+        return self._accepted[source_row]
+
+    def _match_rows(self, first):
+        """
+            Matches the rows of the source model from first to the last one,
+            so that the date filters are evaluated in bulk.
+        """
+        model = self.sourceModel()
+        rows = xrange(first, model.rowCount())
+
+        matches = model.match_rows(self._columns, self._total_score, rows)
+        self._accepted.update(zip(rows, matches))
@@ -0,0 +1,301 @@
+# history_loader.py
+# Copyright (C) 2011 Julien Miotte <miotte.julien@gmail.com>
+#
+# This module is part of gitbuster and is released under the GPLv3
+# License: http://www.gnu.org/licenses/gpl-3.0.txt
+#
+
+from subprocess import Popen, PIPE
+
+from git import Commit, GitCommandError
+
+from gitbuster.commit_store import get_commit_store
+
+# The fields read by "git log" for every commit, in this order.
+LOG_FIELDS = ("hexsha", "tree",
+              "author_name", "author_email", "authored_date",
+              "committer_name", "committer_email", "committed_date",
+              "message")
+LOG_FORMAT = "%x00".join(("%H", "%T",
+                          "%an", "%ae", "%ad",
+                          "%cn", "%ce", "%cd",
+                          "%B"))
+# The fields that are unicode in the commits built by GitPython.
+DECODED_FIELDS = ("author_name", "committer_name", "message")
+
+
+class HistoryLoader:
+    """
+        Reads the history of several references in one pass, and splits it in
+        one list of commits per reference.
+
+        The history shared by several branches is only read once, and the
+        commits are taken from the CommitStore of the repository, so they are
+        shared by all the models filled with a loader.
+    """
+
+    def __init__(self, directory="."):
+        """
+            :param directory:
+                Root directory of the git repository.
+        """
+        self._directory = directory
+        self._store = get_commit_store(directory)
+
+        # The rows, children and unpushed commits of every loaded reference,
+        # see ref_key().
+        self._rows = {}
+        self._children = {}
+        self._unpushed = {}
+
+    def load(self, refs):
+        """
+            Walks the history reachable from the given references (branches
+            or remote references) once.
+
+            :param refs:
+                A list of references.
+        """
+        refs = list(refs)
+        tips = [ref.commit.hexsha for ref in refs]
+        if not tips:
+            return
+
+        order, parents = self._walk(tips)
+
+        store = self._store
+        self._read_commits([hexsha for hexsha in order
+                            if hexsha not in store])
+        for hexsha in order:
+            store.set_parents(hexsha, parents[hexsha])
+
+        unpushed = self._not_pushed(tips)
+        store.set_pushed(unpushed, False)
+        store.set_pushed([hexsha for hexsha in order
+                          if hexsha not in unpushed])
+
+        # The membership of every commit is stored as a bit field: bit i is
+        # set if the commit is reachable from refs[i]. Since children are
+        # listed before their parents, one pass is enough to propagate it.
+        membership = dict.fromkeys(order, 0)
+        positions = {}
+        for position, tip in enumerate(tips):
+            membership[tip] |= 1 << position
+            positions[1 << position] = position
+
+        rows = [[] for ref in refs]
+        for hexsha in order:
+            mask = membership[hexsha]
+            for parent in parents[hexsha]:
+                membership[parent] |= mask
+
+            commit = store.get(hexsha)
+            while mask:
+                lowest_bit = mask & -mask
+                rows[positions[lowest_bit]].append(commit)
+                mask ^= lowest_bit
+
+        for ref, ref_rows in zip(refs, rows):
+            key = ref_key(ref)
+            self._rows[key] = ref_rows
+            self._children[key] = self._children_of(ref_rows)
+            self._unpushed[key] = self._unpushed_of(ref, ref_rows)
+
+    def can_fill(self, git_model):
+        """
+            Returns True if the history of the given GitModel was loaded.
+        """
+        if git_model.is_fake_model():
+            return False
+        return ref_key(self._ref_of(git_model)) in self._rows
+
+    def fill(self, git_model):
+        """
+            Populates the given GitModel (or EditableGitModel) with the loaded
+            history, like GitModel.populate() would have done.
+        """
+        key = ref_key(self._ref_of(git_model))
+        if hasattr(git_model, "get_orig_model"):
+            # This is what EditableGitModel.populate() does.
+            git_model.init_attributes()
+            self.fill(git_model.get_orig_model())
+            # The rows of editable models are modified by insertions and
+            # deletions, they get their own list.
+            rows = list(self._rows[key])
+        else:
+            rows = self._rows[key]
+
+        # These are the attributes set by GitModel.populate(), they are
+        # shared by the models of the same reference.
+        git_model._commits = rows
+        git_model._children = self._children[key]
+        git_model._unpushed = self._unpushed[key]
+
+    def update_pushed(self):
+        """
+            Marks the stored commits that were pushed since they were loaded,
+            for instance after a fetch or a push. Only the commits that
+            weren't pushed are checked.
+
+            :return:
+                The hexshas of the commits that are now pushed.
+        """
+        unpushed = self._store.get_unpushed()
+        pushed = unpushed - self._not_pushed(unpushed)
+        self._store.set_pushed(pushed)
+        return pushed
+
+    def loaded_count(self):
+        """
+            Returns the number of commits read so far.
+        """
+        return len(self._store)
+
+    def _ref_of(self, git_model):
+        """
+            Returns the reference modelized by the given GitModel.
+        """
+        return git_model.get_remote_ref() or git_model.get_current_branch()
+
+    def _walk(self, tips):
+        """
+            Returns the hexshas reachable from the given tips, children first,
+            and the hexshas of the parents of every commit.
+        """
+        command = ["git", "rev-list", "--date-order", "--parents"] + tips
+        handle = Popen(command, cwd=self._directory, stdout=PIPE,
+                       stderr=PIPE)
+        order = []
+        parents = {}
+        for line in handle.stdout:
+            hexshas = line.split()
+            order.append(hexshas[0])
+            parents[hexshas[0]] = hexshas[1:]
+        stderr = handle.stderr.read()
+        if handle.wait():
+            raise GitCommandError(command, handle.returncode, stderr)
+        return order, parents
+
+    def _read_commits(self, hexshas):
+        """
+            Adds the given commits to the commit store. The commits that
+            aren't in the on-disk cache are read with one git log, and added
+            to the cache.
+        """
+        cache = self._store.get_cache()
+        to_read = []
+        for hexsha in hexshas:
+            values = cache.take(hexsha)
+            if values is None:
+                to_read.append(hexsha)
+            else:
+                self._add_commit(values)
+
+        read = self._log(to_read)
+        for values in read:
+            self._add_commit(values)
+        self._store.messages.flush()
+        cache.add(read)
+
+    def _not_pushed(self, hexshas):
+        """
+            Returns the commits reachable from the given commits that aren't
+            reachable from any remote reference. This is one walk, which
+            stops at the pushed history.
+        """
+        if not hexshas:
+            return set()
+
+        command = ["git", "rev-list", "--stdin", "--not", "--remotes"]
+        output = self._run(command, "\n".join(hexshas) + "\n")
+        return set(output.split())
+
+    def _log(self, hexshas):
+        """
+            Reads the metadata of the given commits with one git log, and
+            returns it as a list of dicts.
+        """
+        if not hexshas:
+            return []
+
+        command = ["git", "log", "--no-walk=unsorted", "--stdin", "-z",
+                   "--date=raw", "--format=%s" % LOG_FORMAT]
+        output = self._run(command, "\n".join(hexshas) + "\n")
+
+        fields = output.split("\0")
+        field_count = len(LOG_FIELDS)
+        return [dict(zip(LOG_FIELDS, fields[start:start + field_count]))
+                for start in xrange(0, len(fields) - field_count + 1,
+                                    field_count)]
+
+    def _run(self, command, input):
+        """
+            Runs the given git command with the given input, and returns its
+            output. GitCommandError is raised if the command fails, like
+            GitPython does.
+        """
+        handle = Popen(command, cwd=self._directory, stdin=PIPE, stdout=PIPE,
+                       stderr=PIPE)
+        output, stderr = handle.communicate(input)
+        if handle.returncode:
+            raise GitCommandError(command, handle.returncode, stderr)
+        return output
+
+    def _add_commit(self, values):
+        """
+            Adds a commit to the store, from the values given by git log.
+        """
+        values = dict(values)
+        for field in DECODED_FIELDS:
+            values[field] = decode(values[field])
+        self._store.add(values)
+
+    def _children_of(self, rows):
+        """
+            Returns the children of every commit of the given rows, as built
+            by GitModel.populate().
+        """
+        children = {}
+        for commit in rows:
+            for parent in commit.parents:
+                if parent not in children:
+                    children[parent] = [commit,]
+                else:
+                    children[parent].append(commit)
+        return children
+
+    def _unpushed_of(self, ref, rows):
+        """
+            Returns the commits of the given rows that aren't pushed to the
+            tracking branch of the reference, as built by GitModel.populate().
+        """
+        tracking_branch = None
+        if hasattr(ref, "tracking_branch"):
+            tracking_branch = ref.tracking_branch()
+
+        if tracking_branch is None:
+            return list(rows)
+
+        remote_hexsha = tracking_branch.commit.hexsha
+        unpushed = []
+        for commit in rows:
+            if commit.hexsha == remote_hexsha:
+                break
+            unpushed.append(commit)
+        return unpushed
+
+
+def ref_key(ref):
+    """
+        Returns the key used to store the history of a reference. Remote
+        references given by the RemoteBranchDialog are FetchInfo objects,
+        which don't have a path.
+    """
+    return getattr(ref, "path", ref.name)
+
+
+def decode(value):
+    """
+        git log outputs UTF-8, we want unicode like GitPython gives us.
+    """
+    return value.decode(Commit.default_encoding, "replace")
@@ -5,25 +5,31 @@
 # License: http://www.gnu.org/licenses/gpl-3.0.txt
 #
 
-from PyQt4.QtCore import QObject, SIGNAL
-from PyQt4.QtGui import QKeySequence, QMainWindow, QMessageBox, QShortcut
+from PyQt4.QtCore import QObject, QSettings, QTimer, QVariant, SIGNAL
+from PyQt4.QtGui import QFileDialog, QKeySequence, QLabel, QMainWindow, \
+                        QMessageBox, QProgressBar, QShortcut
 
 from gitbuster import __version__
-from gitbuster.confirm_dialog import ConfirmDialog
 from gitbuster.main_window_ui import Ui_MainWindow
 from gitbuster.q_editable_git_model import QEditableGitModel
 from gitbuster.q_git_model import QGitModel
+from gitbuster.commit_store import get_commit_store
+from gitbuster.history_loader import HistoryLoader, ref_key
+from gitbuster.branch_selection import select_branches
+from gitbuster.profiler import PROFILE, PROFILER, TRACE, TRACER
 from gitbuster.util import _connect_button, select_git_directory, \
-                        run_long_operation
-from gitbuster.remote_branch_dialog import RemoteBranchDialog
+                        run_long_operation, process_start_time, \
+                        RunLongOperation, STARTUP_BENCHMARK
 
 from gitbuster.filter_main_class import FilterMainClass
 from gitbuster.rebase_main_class import RebaseMainClass
-from gitbuster.branch_name_dialog import BranchNameDialog
+# The dialogs, the RefWatcher and the PopulateScheduler are imported when
+# they are first used, to keep the startup short.
 
 from git import Repo
 from subprocess import Popen, PIPE
 import os
+import sys
 import time
 
 
@@ -32,12 +38,33 @@ class MainWindow(QMainWindow):
         Main Window of gitbuster.
     """
 
-    def __init__(self, directory=".", debug=False):
+    def __init__(self, directory=".", debug=False, lazy=False,
+                 background=False, branch_patterns=None, recent_branches=None,
+                 check_dirty=False):
         """
             Initialisation method, setting the directory.
 
             :param directory:
                 Root directory of the git repository.
+            :param lazy:
+                If True, only the model of the current branch is populated at
+                startup. The other models are populated the first time they
+                are displayed.
+            :param background:
+                If True (and not lazy), only the model of the current branch
+                is populated before the window is displayed. The other models
+                are populated in the background.
+            :param branch_patterns:
+                Globs of the branches that get a model (for instance
+                "release/*"). The other branches are listed in the filter tab,
+                and get a model when they are selected.
+            :param recent_branches:
+                If set, the given number of most recently committed branches
+                get a model too.
+            :param check_dirty:
+                If True, the worktree is checked for unstaged changes in the
+                background, and the user is warned before applying if there
+                are some.
         """
         QMainWindow.__init__(self)
 
@@ -46,6 +73,16 @@ class MainWindow(QMainWindow):
 
         self._modifications_shown = True
         self._directory = directory
+        self._lazy = lazy
+        self._background = background
+        self._branch_patterns = branch_patterns
+        self._recent_branches = recent_branches
+        self._unloaded_branches = []
+        self._scheduler = None
+        self._ref_watcher = None
+        self._startup_benchmark = STARTUP_BENCHMARK in os.environ
+        self._dirty_check = None
+        self._index_thread = None
 
         self.current_branch = None
 
@@ -57,18 +94,32 @@ class MainWindow(QMainWindow):
         self.filter_main_class = FilterMainClass(self, directory, self._models)
         self.rebase_main_class = RebaseMainClass(self, directory, self._models)
 
+        self.create_population_status()
+        self.populate_in_background()
+
         self.reset_history()
 
         self._applying = False
 
         self.connect_slots()
 
+        if check_dirty:
+            self.check_dirty_worktree()
+
+        settings = QSettings("majerti", "gitbuster")
+        settings.beginGroup("Options")
+        watch = settings.value("watch repository", QVariant(False)).toBool()
+        self._ui.actionWatch_repository.setChecked(watch)
+        self._ui.actionProfile.setChecked(PROFILER.enabled)
+        self._ui.actionTrace.setChecked(TRACER.enabled)
+
     def create_new_branch_from_model(self, indexes, name=False):
         """
             This method creates a new branch from a given set of indexes.
             The first row of the index set will be used.
         """
         if not name:
+            from gitbuster.branch_name_dialog import BranchNameDialog
             msgBox = BranchNameDialog(self)
             ret = msgBox.exec_()
 
@@ -121,6 +172,17 @@ class MainWindow(QMainWindow):
                 action.setShortcut(shortcut)
             QObject.connect(action, SIGNAL("triggered()"), slot)
 
+        self.connect(gui.actionWatch_repository, SIGNAL("toggled(bool)"),
+                     self.watch_repository)
+        self.connect(gui.actionProfile, SIGNAL("toggled(bool)"),
+                     PROFILER.enable)
+        self.connect(gui.actionExport_profile, SIGNAL("triggered()"),
+                     self.export_profile)
+        self.connect(gui.actionTrace, SIGNAL("toggled(bool)"),
+                     TRACER.enable)
+        self.connect(gui.actionExport_trace, SIGNAL("triggered()"),
+                     self.export_trace)
+
         self.connect(self.rebase_main_class, SIGNAL("newHistAction"),
                      self.add_history_action)
         self.connect(self.rebase_main_class, SIGNAL("newBranchFromCommit"),
@@ -157,7 +219,121 @@ class MainWindow(QMainWindow):
             ret = True
 
         if ret:
-            self.set_current_directory(self._directory, reset_all=True)
+            self.refresh_models()
+
+    def refresh_models(self, keep_remote_models=False):
+        """
+            Updates the models after the references of the repository were
+            modified, without rebuilding the two tabs: the models of the
+            branches whose tip moved (or that were modified in gitbuster) are
+            populated again, the models of the deleted branches are removed,
+            and models are added for the new branches.
+
+            :param keep_remote_models:
+                If True, the models of the remote references (added with the
+                remote branch dialog) are kept as they are, instead of being
+                removed like the models of the deleted branches.
+        """
+        if self._scheduler:
+            self._scheduler.stop()
+            self._scheduler = None
+
+        a_model = QGitModel(self._directory)
+        self.current_branch = a_model.get_current_branch()
+        branches = dict((ref_key(branch), branch)
+                        for branch in a_model.get_branches())
+
+        # Only the commits we don't know yet are read by the loader, see
+        # CommitStore.
+        self._loader = HistoryLoader(self._directory)
+
+        to_populate = []
+        for branch, model in self._models.items():
+            key = ref_key(branch)
+            if keep_remote_models and model.get_remote_ref():
+                continue
+            elif key not in branches:
+                # Deleted branches, remote references and fake models.
+                self.remove_model(model)
+            elif model.is_populated():
+                tip = model.get_orig_git_model().get_commits()[0]
+                if tip.hexsha != branches[key].commit.hexsha or \
+                   model.should_be_written():
+                    to_populate.append(model)
+
+        known = set(ref_key(branch) for branch in self._models)
+        selected = set(ref_key(branch)
+                       for branch in self.select_branches(branches.values()))
+        new_models = [self.create_model(branch)
+                      for key, branch in branches.items()
+                      if key not in known and key in selected]
+        self._unloaded_branches = [branch
+                                   for key, branch in sorted(branches.items())
+                                   if key not in known and key not in selected]
+        if not (self._lazy or self._background):
+            to_populate.extend(new_models)
+
+        self._loader.load([model.get_current_branch()
+                           for model in to_populate])
+        for model in to_populate:
+            model.populate(self._loader)
+
+        # The remote references may have moved too (after a fetch or a
+        # push), the other models are repainted if commits were pushed.
+        if self._loader.update_pushed():
+            for model in self._models.values():
+                if model.is_populated() and model not in to_populate:
+                    model.pushed_changed()
+
+        for model in new_models:
+            self._models[model.get_current_branch()] = model
+            self.filter_main_class.add_new_model(model)
+            self.rebase_main_class.create_model_interface(model)
+        self.filter_main_class.set_unloaded_branches(self._unloaded_branches)
+
+        self.reset_history()
+        self.enable_modifications_buttons(False)
+        self.populate_in_background()
+
+    def watch_repository(self, enabled):
+        """
+            Starts or stops watching the references of the repository. When
+            they are modified outside of gitbuster, the models are refreshed.
+        """
+        settings = QSettings("majerti", "gitbuster")
+        settings.beginGroup("Options")
+        settings.setValue("watch repository", QVariant(enabled))
+
+        if self._ref_watcher:
+            self._ref_watcher.stop()
+            self._ref_watcher = None
+
+        if enabled:
+            from gitbuster.ref_watcher import RefWatcher
+            git_dir = Repo(self._directory).git_dir
+            self._ref_watcher = RefWatcher(git_dir, parent=self)
+            self.connect(self._ref_watcher, SIGNAL("refsChanged"),
+                         self.refs_changed)
+            self._ref_watcher.start()
+
+    def refs_changed(self):
+        """
+            Called by the RefWatcher when the references of the repository
+            were modified outside of gitbuster.
+        """
+        if self._applying:
+            return
+
+        if [model for model in self._models.values()
+            if model.should_be_written()]:
+            # We don't want to throw away the user's modifications.
+            self.statusBar().showMessage("The repository was modified, "
+                                         "refresh to see the changes.")
+            return
+
+        # The user didn't ask for this refresh: the models of the remote
+        # references they opened are kept.
+        self.refresh_models(keep_remote_models=True)
 
     def about_box(self):
         """
@@ -168,12 +344,35 @@ class MainWindow(QMainWindow):
                "com>\nWritten in Python, using PyQt4 and GitPython."
         QMessageBox.information(self, title, text, QMessageBox.Ok)
 
+    def export_profile(self):
+        """
+            Exports the records of the profiler to a JSON file chosen by the
+            user.
+        """
+        filepath = QFileDialog.getSaveFileName(self, "Export the profile",
+                                               "gitbuster-profile.json",
+                                               "JSON files (*.json)")
+        if filepath:
+            PROFILER.export(unicode(filepath))
+
+    def export_trace(self):
+        """
+            Exports the spans recorded by the tracer to a Chrome trace file
+            chosen by the user.
+        """
+        filepath = QFileDialog.getSaveFileName(self, "Export the trace",
+                                               "gitbuster-trace.json",
+                                               "JSON files (*.json)")
+        if filepath:
+            TRACER.export(unicode(filepath))
+
     def new_remote_branch(self):
         """
             Create a new branch.
             This can be a branch build with a directory repository or with an
             URL repository.
         """
+        from gitbuster.remote_branch_dialog import RemoteBranchDialog
         dialog = RemoteBranchDialog(self, self._directory)
         ret = dialog.exec_()
 
@@ -203,6 +402,9 @@ class MainWindow(QMainWindow):
         """
             This remove a previously displayed model.
         """
+        for branch, _model in self._models.items():
+            if _model == model:
+                del self._models[branch]
         self.filter_main_class.remove_model(model)
         self.rebase_main_class.remove_model(model)
 
@@ -335,25 +537,196 @@ class MainWindow(QMainWindow):
             :param directory:
                 The git directory.
         """
+        if self._scheduler:
+            self._scheduler.stop()
+            self._scheduler = None
+
+        self._directory = directory
         self._models = {}
         a_model = QGitModel(directory)
         self.current_branch = a_model.get_current_branch()
+        all_branches = a_model.get_branches()
+        branches = self.select_branches(all_branches)
+        selected = set(ref_key(branch) for branch in branches)
+        self._unloaded_branches = [branch for branch in all_branches
+                                   if ref_key(branch) not in selected]
+
+        # The history of every branch populated now is read in one pass.
+        self._loader = HistoryLoader(directory)
+        populate_now = not (self._lazy or self._background)
+        if populate_now:
+            self._loader.load(branches)
+        else:
+            self._loader.load([self.current_branch])
 
-        for branch in a_model.get_branches():
-            model = QEditableGitModel(self._models, directory=directory,
-                                      parent=self)
-            model.set_current_branch(branch)
-            model.setMerge(False)
-            model.enable_option("filters")
-            model.populate()
+        for branch in branches:
+            model = self.create_model(branch, directory)
+            if populate_now or branch == self.current_branch:
+                model.populate(self._loader)
             self._models[branch] = model
 
-            QObject.connect(model, SIGNAL("newHistoryEvent"),
-                            self.new_history_event)
-
         if reset_all:
             self.rebase_main_class.reset_interface(self._models)
             self.filter_main_class.reset_interface(self._models)
+            self.populate_in_background()
+
+        if self._ref_watcher:
+            # Watch the new repository.
+            self.watch_repository(True)
+
+    def select_branches(self, branches):
+        """
+            Returns the branches that should get a model, see the
+            branch_patterns and recent_branches parameters of __init__.
+        """
+        return select_branches(self._directory, branches,
+                               patterns=self._branch_patterns,
+                               recent=self._recent_branches,
+                               current_branch=self.current_branch)
+
+    def get_unloaded_branches(self):
+        """
+            Returns the branches that don't have a model yet.
+        """
+        return self._unloaded_branches
+
+    def load_branch(self, branch):
+        """
+            Creates the model of a branch that wasn't selected at startup, and
+            adds it to the rebase tab.
+        """
+        self._unloaded_branches.remove(branch)
+        model = self.create_model(branch)
+        self._models[branch] = model
+        self.populate_model(model)
+        self.rebase_main_class.create_model_interface(model)
+        return model
+
+    def create_model(self, branch, directory=None):
+        """
+            Creates the (unpopulated) model of the given branch.
+        """
+        model = QEditableGitModel(self._models,
+                                  directory=directory or self._directory,
+                                  parent=self)
+        model.set_current_branch(branch)
+        model.setMerge(False)
+        model.enable_option("filters")
+
+        QObject.connect(model, SIGNAL("newHistoryEvent"),
+                        self.new_history_event)
+        return model
+
+    def populate_model(self, model):
+        """
+            Populates the given model if it wasn't populated yet (in lazy mode
+            or if the background population isn't finished) and informs the
+            two tabs that the placeholder can be replaced.
+        """
+        if self._scheduler:
+            self._scheduler.take(model)
+
+        if model.is_populated():
+            return
+
+        run_long_operation("Loading %s" % model.name_to_display(),
+                           self.populate_git_model, (model,), parent=self)
+        model.finish_populate()
+        self.model_populated(model)
+
+    def populate_git_model(self, model):
+        """
+            Reads the history of the model's reference with the history loader
+            and populates the git model (this is run in a LongOperationBox).
+        """
+        git_model = model.get_git_model()
+        if not self._loader.can_fill(git_model) and \
+           not git_model.is_fake_model():
+            ref = model.get_current_branch() or model.get_remote_ref()
+            self._loader.load([ref])
+        model.populate_git_model(self._loader)
+
+    def model_populated(self, model):
+        """
+            Replaces the placeholders of the given model in the two tabs.
+        """
+        self.filter_main_class.model_populated(model)
+        self.rebase_main_class.model_populated(model)
+        self.index_messages()
+
+    def index_messages(self):
+        """
+            Indexes the words and the trigrams of the messages loaded since
+            the last time, in the background (see CommitStore.update_indexes).
+            The message filter uses the indexes as soon as a part of them is
+            ready.
+        """
+        if self._index_thread is not None and self._index_thread.isRunning():
+            # The messages loaded meanwhile are indexed when it's finished.
+            return
+
+        store = get_commit_store(self._directory)
+        if not store.indexes_outdated():
+            self._index_thread = None
+            return
+
+        self._index_thread = RunLongOperation(store.update_indexes, (), {})
+        self.connect(self._index_thread, SIGNAL("finished()"),
+                     self.index_messages)
+        self._index_thread.start()
+
+    def create_population_status(self):
+        """
+            Creates the status bar widgets used to display the progress of the
+            background population.
+        """
+        self._population_label = QLabel(self)
+        self._population_bar = QProgressBar(self)
+        self._population_bar.setMaximumWidth(150)
+        self._population_bar.hide()
+
+        status_bar = self.statusBar()
+        status_bar.addWidget(self._population_label, 1)
+        status_bar.addPermanentWidget(self._population_bar)
+
+    def populate_in_background(self):
+        """
+            Starts populating the models that aren't populated yet in the
+            background (if we're in background mode).
+        """
+        to_populate = [model for model in self._models.values()
+                       if not model.is_populated()]
+        if not self._background or self._lazy or not to_populate:
+            return
+
+        from gitbuster.populate_scheduler import PopulateScheduler
+        self._scheduler = PopulateScheduler(to_populate, loader=self._loader,
+                                            parent=self)
+        self.connect(self._scheduler, SIGNAL("modelPopulated"),
+                     self.model_populated)
+        self.connect(self._scheduler, SIGNAL("progress"),
+                     self.population_progress)
+        self.connect(self._scheduler, SIGNAL("finished"),
+                     self.population_finished)
+        self._scheduler.start()
+
+    def population_progress(self, text, done, total):
+        """
+            Displays the progress of the background population.
+        """
+        self._population_label.setText(text)
+        self._population_bar.setRange(0, total)
+        self._population_bar.setValue(done)
+        self._population_bar.show()
+
+    def population_finished(self):
+        """
+            The background population is finished, hide the progress widgets.
+        """
+        self._scheduler = None
+        self._population_label.setText("")
+        self._population_bar.hide()
+        self.statusBar().showMessage("All branches are loaded.", 3000)
 
     def change_directory(self):
         """
@@ -392,27 +765,93 @@ class MainWindow(QMainWindow):
 
         self._applying = True
 
-        def get_to_write_models():
-            return [model for model in self._models.values()
-                    if model.should_be_written()]
+        with TRACER.span("apply"):
+            if not self.confirm_dirty_worktree():
+                self._applying = False
+                return
 
-        to_write_models = run_long_operation("Counting modifications",
-                                             get_to_write_models,
-                                             parent=self)
+            def get_to_write_models():
+                return [model for model in self._models.values()
+                        if model.should_be_written()]
 
-        if to_write_models:
-            msgBox = ConfirmDialog(to_write_models)
-            ret = msgBox.exec_()
+            to_write_models = run_long_operation("Counting modifications",
+                                                 get_to_write_models,
+                                                 parent=self)
 
-            if ret and msgBox.checked_models():
-                log = msgBox.log_checked()
-                force_committed_date = msgBox.force_checked()
+            if to_write_models:
+                from gitbuster.confirm_dialog import ConfirmDialog
+                with TRACER.span("Confirm dialog"):
+                    msgBox = ConfirmDialog(to_write_models)
+                    ret = msgBox.exec_()
 
-                self.apply_models(msgBox.checked_models(), log,
-                                  force_committed_date)
+                if ret and msgBox.checked_models():
+                    log = msgBox.log_checked()
+                    force_committed_date = msgBox.force_checked()
+
+                    self.apply_models(msgBox.checked_models(), log,
+                                      force_committed_date)
 
         self._applying = False
 
+    def check_dirty_worktree(self):
+        """
+            Starts checking the worktree for unstaged changes. This can take
+            a while on big worktrees, so it's done in the background, and the
+            result is only needed before applying.
+        """
+        self._dirty_check = RunLongOperation(is_dirty_worktree,
+                                             (self._directory,), {})
+        self.connect(self._dirty_check, SIGNAL("finished()"),
+                     self.dirty_check_finished)
+        self._dirty_check.start()
+
+    def dirty_check_finished(self):
+        """
+            Called when the worktree check is finished.
+        """
+        if self._dirty_check and self._dirty_check.result():
+            self.statusBar().showMessage("The repository has unstaged "
+                                         "changes, you should commit or stash "
+                                         "them before applying.")
+
+    def confirm_dirty_worktree(self):
+        """
+            Warns the user if the worktree has unstaged changes, waiting for
+            the check if it isn't finished. Returns False if the user doesn't
+            want to apply.
+        """
+        if self._dirty_check is None:
+            return True
+
+        if self._dirty_check.isRunning():
+            run_long_operation("Checking the repository",
+                               self._dirty_check.wait, parent=self)
+
+        if not self._dirty_check.result():
+            self._dirty_check = None
+            return True
+
+        warning_title = "Unclean repository"
+        warning_text = "The chosen repository has unstaged changes. " \
+                       "You should commit or stash them. "\
+                       "Do you want to continue anyway ?"
+        warning_choice = QMessageBox.warning(self, warning_title,
+                                             warning_text,
+                                             "Yes",
+                                             button1Text="No",
+                                             button2Text ="Stash")
+
+        if warning_choice == 1:
+            # The user may clean the worktree before the next apply.
+            self.check_dirty_worktree()
+            return False
+        elif warning_choice == 2:
+            Repo(self._directory).git.stash()
+
+        self._dirty_check = None
+        self.statusBar().clearMessage()
+        return True
+
     def apply_models(self, models, log, force_committed_date):
         """
             Applies the given models.
@@ -426,10 +865,11 @@ class MainWindow(QMainWindow):
                     This is like write(), except we wait for the write to
                     finish.
                 """
-                model.write(log, force_committed_date, dont_populate)
+                with TRACER.span("write", branch=model.name_to_display()):
+                    model.write(log, force_committed_date, dont_populate)
 
-                while not(model.is_finished_writing()):
-                    time.sleep(1)
+                    while not(model.is_finished_writing()):
+                        time.sleep(1)
 
                 return model.is_write_success()
 
@@ -449,6 +889,8 @@ class MainWindow(QMainWindow):
             This method is called when the progress thread is started.
         """
         self._applying = True
+        if self._ref_watcher:
+            self._ref_watcher.suspend()
 
     def apply_finished(self, write_results):
         """
@@ -457,19 +899,39 @@ class MainWindow(QMainWindow):
         self._applying = False
         self._ui.applyButton.setEnabled(True)
 
+        with TRACER.span("apply_finished"):
+            self._update_written_models(write_results)
+
+        if self._ref_watcher:
+            self._ref_watcher.resume()
+
+    def _update_written_models(self, write_results):
+        """
+            Rebuilds or populates the written models, and shows the first
+            conflict of the models that couldn't be written.
+        """
         a_repo = Repo(self._directory)
+        branches = dict((branch.name, branch) for branch in a_repo.branches)
+
+        # The written branches are read again by the loader: only their new
+        # commits are added to the commit store.
+        written = []
+        for model, success in write_results.items():
+            if success and model.is_fake_model():
+                written.append(branches[model.name_to_display()])
+            elif success:
+                written.append(model.get_current_branch())
+        self._loader.load(written)
 
         for model, success in write_results.items():
             if success and model.is_fake_model():
                 # If the applied models were fake, rebuild them.
-                branch_name = model.name_to_display()
-                new_branch = [branch for branch in a_repo.branches
-                              if branch.name == branch_name][0]
+                new_branch = branches[model.name_to_display()]
                 new_model = QEditableGitModel(self._models,
                                               directory=self._directory,
                                               parent=self)
                 new_model.set_current_branch(new_branch)
-                new_model.populate()
+                new_model.populate(self._loader)
                 self.remove_model(model)
                 self.add_new_model(new_model)
 
@@ -478,11 +940,14 @@ class MainWindow(QMainWindow):
                     for error in model.write_errors():
                         print error
                 else:
-                    model.reset()
-                    conflicting_index = model.get_conflicting_index()
-                    self.rebase_main_class.commit_clicked(conflicting_index)
+                    with TRACER.span("conflict",
+                                     branch=model.name_to_display()):
+                        model.reset()
+                        conflicting_index = model.get_conflicting_index()
+                        self.rebase_main_class.commit_clicked(
+                                                        conflicting_index)
             elif success:
-                model.populate()
+                model.populate(self._loader)
 
         if True in write_results.values():
             # Reset history
@@ -505,6 +970,23 @@ class MainWindow(QMainWindow):
         if ret:
             self.close()
 
+    def paintEvent(self, event):
+        """
+            Reports the startup time on the first paint, if we're running the
+            startup benchmark.
+        """
+        QMainWindow.paintEvent(self, event)
+
+        if self._startup_benchmark:
+            self._startup_benchmark = False
+            start_time = process_start_time()
+            if start_time is not None:
+                print "First paint: %.3f seconds" % (time.time() - start_time)
+            else:
+                print "First paint: unknown process start time"
+            sys.stdout.flush()
+            QTimer.singleShot(0, self.close)
+
     def closeEvent(self, event):
         """
             Catching the close event to do some cleanup
@@ -513,6 +995,20 @@ class MainWindow(QMainWindow):
             handle = Popen(command, shell=True, stdout=PIPE, stderr=PIPE)
             handle.wait()
 
+        if self._scheduler:
+            self._scheduler.stop()
+        if self._ref_watcher:
+            self._ref_watcher.stop()
+        if self._dirty_check:
+            self._dirty_check.wait()
+        if self._index_thread:
+            get_commit_store(self._directory).stop_indexing()
+            self._index_thread.wait()
+        if os.environ.get(PROFILE):
+            PROFILER.export(os.environ[PROFILE])
+        if os.environ.get(TRACE):
+            TRACER.export(os.environ[TRACE])
+
         a_repo = Repo(self._directory)
         os.chdir(self._directory)
 
@@ -530,3 +1026,11 @@ class MainWindow(QMainWindow):
                                     if branch.name != 'gitbuster_rebase'][0]
             run_command("git checkout %s" % fallback_branch_name)
             run_command("git branch -D gitbuster_rebase")
+
+
+def is_dirty_worktree(directory):
+    """
+        Returns True if the worktree of the given repository has unstaged
+        changes.
+    """
+    return Repo(directory).is_dirty()
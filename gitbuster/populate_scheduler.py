@@ -0,0 +1,210 @@
+# populate_scheduler.py
+# Copyright (C) 2011 Julien Miotte <miotte.julien@gmail.com>
+#
+# This module is part of gitbuster and is released under the GPLv3
+# License: http://www.gnu.org/licenses/gpl-3.0.txt
+#
+
+from PyQt4.QtCore import QObject, QThread, QTimer, SIGNAL
+
+# We don't want to start too many git processes at once.
+MAX_THREADS = 4
+# Delay between two progress reports, in milliseconds.
+PROGRESS_INTERVAL = 500
+
+
+class LoadThread(QThread):
+    """
+        Reads the history of the given references with a HistoryLoader.
+    """
+
+    def __init__(self, loader, refs):
+        QThread.__init__(self)
+        self._loader = loader
+        self._refs = refs
+
+    def run(self):
+        self._loader.load(self._refs)
+
+
+class PopulateThread(QThread):
+    """
+        Populates the git model of the given QGitModel. The QGitModel itself
+        must be reset in the GUI thread, see PopulateScheduler.
+    """
+
+    def __init__(self, model, loader=None):
+        QThread.__init__(self)
+        self._model = model
+        self._loader = loader
+
+    def run(self):
+        self._model.populate_git_model(self._loader)
+
+
+class PopulateScheduler(QObject):
+    """
+        Populates a list of models in the background, using a bounded number
+        of threads. If a HistoryLoader is given, the history of all the models
+        is first read at once, and the models are then filled by the loader.
+
+        The following signals are emitted:
+            - "modelPopulated" with the model, each time a model is populated.
+            - "progress" with a text, the number of populated models and the
+              total number of models.
+            - "finished" when all the models are populated.
+    """
+
+    def __init__(self, models, loader=None, max_threads=MAX_THREADS,
+                 parent=None):
+        QObject.__init__(self, parent)
+
+        self._loader = loader
+        self._load_thread = None
+        self._queue = list(models)
+        self._total = len(self._queue)
+        self._done = 0
+        self._running = {}
+        self._max_threads = max(1, min(max_threads,
+                                       QThread.idealThreadCount()))
+
+        self._progress_timer = QTimer(self)
+        self.connect(self._progress_timer, SIGNAL("timeout()"),
+                     self.report_progress)
+
+    def start(self):
+        """
+            Starts populating the models.
+        """
+        self._progress_timer.start(PROGRESS_INTERVAL)
+        if self._loader is not None:
+            refs = [model.get_current_branch() or model.get_remote_ref()
+                    for model in self._queue]
+            self._load_thread = LoadThread(self._loader, refs)
+            self.connect(self._load_thread, SIGNAL("finished()"),
+                         self._load_finished)
+            self._load_thread.start()
+        else:
+            self._start_threads()
+        self.report_progress()
+
+    def stop(self):
+        """
+            Empties the queue and waits for the running threads. The models
+            that were being populated are left as they are.
+        """
+        self._queue = []
+        self._progress_timer.stop()
+        if self._load_thread is not None:
+            self._load_thread.wait()
+            self._load_thread = None
+        for thread in self._running:
+            thread.wait()
+        self._running = {}
+
+    def is_finished(self):
+        """
+            Returns True if there is no model left to populate.
+        """
+        return not self._queue and not self._running
+
+    def take(self, model):
+        """
+            Makes sure the given model won't be populated in the background.
+            If a thread is populating it, we wait for the thread to finish.
+            Otherwise the model is removed from the queue and the caller is
+            responsible for populating it.
+        """
+        if self._load_thread is not None:
+            # The loader can't be used by two threads at once.
+            self._load_thread.wait()
+            self._load_finished()
+
+        for thread, running_model in self._running.items():
+            if running_model == model:
+                thread.wait()
+                self._model_populated(thread)
+                return
+
+        if model in self._queue:
+            self._queue.remove(model)
+            self._total -= 1
+
+    def report_progress(self):
+        """
+            Emits a progress signal describing the models being populated.
+        """
+        if self._load_thread is not None:
+            text = "Reading the history of %d branches" % self._total
+            self.emit(SIGNAL("progress"), text, self._done, self._total)
+            return
+
+        loading = ["%s (%d commits)" % (model.name_to_display(),
+                                        loaded_commits(model))
+                   for model in self._running.values()]
+        text = "Loading branches %d/%d" % (self._done, self._total)
+        if loading:
+            text += ": " + ", ".join(loading)
+        self.emit(SIGNAL("progress"), text, self._done, self._total)
+
+    def _load_finished(self):
+        """
+            Called when the loader has read the history of all the models.
+        """
+        if self._load_thread is None:
+            # We already waited for the load thread, see take().
+            return
+
+        self._load_thread = None
+        self._start_threads()
+
+    def _start_threads(self):
+        """
+            Starts threads until the queue is empty or the maximum number of
+            threads is reached.
+        """
+        while self._queue and len(self._running) < self._max_threads:
+            model = self._queue.pop(0)
+            thread = PopulateThread(model, self._loader)
+            self.connect(thread, SIGNAL("finished()"), self._thread_finished)
+            self._running[thread] = model
+            thread.start()
+
+    def _thread_finished(self):
+        """
+            Called (in the GUI thread) when a PopulateThread is finished.
+        """
+        self._model_populated(self.sender())
+
+    def _model_populated(self, thread):
+        """
+            Resets the model populated by the given thread and starts the
+            next threads.
+        """
+        if thread not in self._running:
+            # We already waited for this thread, see take().
+            return
+
+        model = self._running.pop(thread)
+        self._done += 1
+        model.finish_populate()
+        self.emit(SIGNAL("modelPopulated"), model)
+
+        self._start_threads()
+        self.report_progress()
+
+        if self.is_finished():
+            self._progress_timer.stop()
+            self.emit(SIGNAL("finished"))
+
+
+def loaded_commits(model):
+    """
+        Returns the number of commits already loaded by the given model. This
+        can be called while the model is populated.
+    """
+    count = model.get_git_model().row_count()
+    if hasattr(model, "get_orig_git_model") and model.get_orig_git_model():
+        # Editable models populate their original model first.
+        count = max(count, model.get_orig_git_model().row_count())
+    return count
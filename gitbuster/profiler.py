@@ -0,0 +1,289 @@
+# profiler.py
+# Copyright (C) 2011 Julien Miotte <miotte.julien@gmail.com>
+#
+# This module is part of gitbuster and is released under the GPLv3
+# License: http://www.gnu.org/licenses/gpl-3.0.txt
+#
+
+from math import frexp
+from thread import get_ident
+from threading import Lock
+import json
+import os
+import time
+
+# If this environment variable is set, the models are profiled from the
+# start, and the records are exported to the JSON file it names when the main
+# window is closed.
+PROFILE = "GITBUSTER_PROFILE"
+# If this environment variable is set, the spans of the long operations are
+# recorded from the start, and written as a Chrome trace (see Tracer) to the
+# file it names when the main window is closed.
+TRACE = "GITBUSTER_TRACE"
+
+# The names of the records of QGitModel.data(), by role. The roles are the
+# values of the Qt.ItemDataRole enum, this module doesn't import PyQt4.
+DATA_RECORDS = {0: "data(DisplayRole)",
+                1: "data(DecorationRole)",
+                2: "data(EditRole)",
+                3: "data(ToolTipRole)",
+                6: "data(FontRole)",
+                7: "data(TextAlignmentRole)",
+                8: "data(BackgroundColorRole)",
+                9: "data(ForegroundRole)",
+                10: "data(CheckStateRole)",
+                13: "data(SizeHintRole)"}
+
+
+class Record:
+    """
+        The number of calls of an operation, their total, minimal and maximal
+        durations, and an histogram of the durations.
+
+        The buckets of the histogram are powers of two, in microseconds: the
+        bucket n counts the calls that took less than 2**n microseconds (and
+        more than 2**(n-1)).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.
+        self.minimum = None
+        self.maximum = 0.
+        self.histogram = {}
+
+    def add(self, duration):
+        """
+            Adds a call that took the given duration, in seconds.
+        """
+        self.count += 1
+        self.total += duration
+        if self.minimum is None or duration < self.minimum:
+            self.minimum = duration
+        self.maximum = max(self.maximum, duration)
+
+        bucket = frexp(max(duration * 1e6, 1))[1]
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+
+    def to_dict(self):
+        """
+            Returns the record as a dict that can be exported to JSON. The
+            histogram is a list of (upper bound in microseconds, count).
+        """
+        return {"count": self.count,
+                "total": self.total,
+                "mean": self.count and self.total / self.count,
+                "min": self.minimum or 0.,
+                "max": self.maximum,
+                "histogram": [(2 ** bucket, count) for bucket, count
+                              in sorted(self.histogram.items())]}
+
+
+class Profiler:
+    """
+        Counts and times the operations of the models.
+
+        The operations only check the enabled attribute when the profiler is
+        disabled, so that profiling costs nothing by default. Records can be
+        added from several threads (the models are populated in threads).
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._records = {}
+        self._lock = Lock()
+
+    def enable(self, enabled=True):
+        """
+            Starts or stops recording the operations. The records are kept.
+        """
+        self.enabled = enabled
+
+    def clear(self):
+        """
+            Removes the records.
+        """
+        self._lock.acquire()
+        try:
+            self._records.clear()
+        finally:
+            self._lock.release()
+
+    def record(self, name, duration):
+        """
+            Adds a call of the named operation, which took the given
+            duration in seconds.
+        """
+        self._lock.acquire()
+        try:
+            if name not in self._records:
+                self._records[name] = Record()
+            self._records[name].add(duration)
+        finally:
+            self._lock.release()
+
+    def get_records(self):
+        """
+            Returns the records as dicts, by operation name, see
+            Record.to_dict().
+        """
+        self._lock.acquire()
+        try:
+            return dict((name, record.to_dict())
+                        for name, record in self._records.items())
+        finally:
+            self._lock.release()
+
+    def export(self, path):
+        """
+            Writes the records to the given JSON file.
+        """
+        json_file = open(path, "w")
+        try:
+            json.dump(self.get_records(), json_file, indent=2, sort_keys=True)
+        finally:
+            json_file.close()
+
+
+def profiled(name):
+    """
+        Decorator recording the calls of the decorated function in the
+        profiler, under the given name.
+    """
+    def decorator(function):
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return function(*args, **kwargs)
+
+            start_time = time.time()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                PROFILER.record(name, time.time() - start_time)
+        wrapper.__name__ = function.__name__
+        wrapper.__doc__ = function.__doc__
+        return wrapper
+    return decorator
+
+
+class Span:
+    """
+        A span of the Tracer, used in a with statement.
+    """
+
+    def __init__(self, tracer, name, args):
+        self._tracer = tracer
+        self._name = name
+        self._args = args
+        self._start_time = None
+
+    def __enter__(self):
+        self._start_time = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._tracer.add_span(self._name, self._start_time, time.time(),
+                              self._args)
+        return False
+
+
+class _DisabledSpan:
+    """
+        The span returned by a disabled Tracer, which records nothing.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+class Tracer:
+    """
+        Records the spans of the long operations (populating, counting the
+        modifications, writing...), and exports them in the Chrome
+        trace-event format, which can be opened in chrome://tracing.
+
+        The spans are nested by the viewer: a span that starts and ends
+        during another span of the same thread is displayed under it.
+
+            with TRACER.span("write", branch="master"):
+                ...
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._events = []
+        self._lock = Lock()
+        self._origin = time.time()
+        self._disabled_span = _DisabledSpan()
+
+    def enable(self, enabled=True):
+        """
+            Starts or stops recording the spans. The spans are kept.
+        """
+        self.enabled = enabled
+
+    def clear(self):
+        """
+            Removes the recorded spans.
+        """
+        self._lock.acquire()
+        try:
+            self._events = []
+        finally:
+            self._lock.release()
+
+    def span(self, name, **args):
+        """
+            Returns a span with the given name, recorded when the with
+            statement exits. The keyword arguments are displayed with the
+            span.
+        """
+        if not self.enabled:
+            return self._disabled_span
+        return Span(self, name, args)
+
+    def add_span(self, name, start_time, end_time, args=None):
+        """
+            Records a span of the current thread, from the given times (as
+            given by time.time()).
+        """
+        event = {"name": name,
+                 "ph": "X",
+                 "ts": int((start_time - self._origin) * 1e6),
+                 "dur": int((end_time - start_time) * 1e6),
+                 "pid": os.getpid(),
+                 "tid": get_ident(),
+                 "args": args or {}}
+        self._lock.acquire()
+        try:
+            self._events.append(event)
+        finally:
+            self._lock.release()
+
+    def export(self, path):
+        """
+            Writes the spans to the given file, in the Chrome trace-event
+            JSON format.
+        """
+        self._lock.acquire()
+        try:
+            events = list(self._events)
+        finally:
+            self._lock.release()
+
+        trace_file = open(path, "w")
+        try:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"},
+                      trace_file)
+        finally:
+            trace_file.close()
+
+
+# The profiler and the tracer of the process.
+PROFILER = Profiler()
+PROFILER.enable(PROFILE in os.environ)
+TRACER = Tracer()
+TRACER.enable(TRACE in os.environ)
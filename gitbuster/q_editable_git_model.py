@@ -8,8 +8,10 @@
 from PyQt4.QtCore import QAbstractTableModel, QDataStream, QIODevice, \
         QModelIndex, QString, QStringList, QVariant, Qt, SIGNAL
 from PyQt4.QtGui import QColor, QFont
-from gfbi_core import NOT_EDITABLE_FIELDS, TIME_FIELDS
 from gfbi_core.editable_git_model import EditableGitModel
+from gfbi_core.util import DummyCommit
+from gitbuster.column_schema import OBJECT_KIND, TIME_KIND
+from gitbuster.profiler import profiled
 from gitbuster.q_git_model import QGitModel
 
 
@@ -30,11 +32,6 @@ class QEditableGitModel(QGitModel):
             Non editable QGitModel can be initialized with a GitModel(to limit
             the number of GitModels).
         """
-        QGitModel.__init__(self,
-                           directory=directory,
-                           fake_branch_name=fake_branch_name,
-                           parent=parent)
-
         if from_model_row:
             from_model, from_row = from_model_row
             git_model = from_model.get_orig_git_model()
@@ -42,13 +39,20 @@ class QEditableGitModel(QGitModel):
         else:
             from_commits = False
 
-        # Overwrite the non editable git_model set in QGitModel.__init__
-        self.git_model = EditableGitModel(directory=directory,
-                                          fake_branch_name=fake_branch_name,
-                                          from_commits=from_commits)
+        # The editable git model is given to QGitModel.__init__, so that it
+        # doesn't instanciate a GitModel we don't need.
+        QGitModel.__init__(self,
+                           directory=directory,
+                           model=EditableGitModel(
+                                        directory=directory,
+                                        fake_branch_name=fake_branch_name,
+                                        from_commits=from_commits),
+                           fake_branch_name=fake_branch_name,
+                           parent=parent)
 
         self._enabled_options = []
         self._all_models_dict = models_dict
+        self._role_handlers[Qt.FontRole] = self._data_font
 
         # The following is used to store the write options
         self._previous_log_option = True
@@ -62,27 +66,42 @@ class QEditableGitModel(QGitModel):
         else:
             self.orig_q_git_model = None
 
-    def populate(self):
+    def populate(self, loader=None):
         """
             This populates the model.
             We may want to build orig_q_git_model too.
+
+            :param loader:
+                See QGitModel.populate().
+        """
+        QGitModel.populate(self, loader)
+
+    def finish_populate(self):
         """
-        QGitModel.populate(self)
+            See QGitModel.finish_populate. The original model was populated
+            too, its views are reset.
+        """
+        QGitModel.finish_populate(self)
+        if self.orig_q_git_model:
+            self.orig_q_git_model.finish_populate()
 
+    @profiled("setData")
     def setData(self, index, value, role=Qt.EditRole):
         """
             Sets the data when the model is modified (qt model method).
         """
-        if index.isValid() and 0 <= index.row() < self.rowCount():
-            column = index.column()
-            field_name = self.git_model.get_columns()[column]
+        # The rows that aren't fetched yet may be modified too (for instance
+        # the parent of a removed commit).
+        if index.isValid() and 0 <= index.row() < self.git_model.row_count():
+            kind = self._schema.kind(index.column())
 
-            if field_name in TIME_FIELDS or field_name in ("parents", "tree", "children"):
+            if kind == TIME_KIND or kind == OBJECT_KIND:
                 new_value = value
             else:
                 new_value = unicode(value.toString())
 
             self.git_model.set_data(index, new_value)
+            self.clear_display_cache(index.row(), index.column())
             self.emit(SIGNAL("dataChanged(QModelIndex, QModelIndex)"),
                       index, index)
             return True
@@ -93,8 +112,15 @@ class QEditableGitModel(QGitModel):
             Inserts a given number of rows in the model, starting at the given
             position.
         """
+        # The views must know the rows up to the position, so that the
+        # inserted rows are fetched, see fetchMore.
+        self.fetch_until(position)
         self.beginInsertRows(QModelIndex(), position, position + rows - 1)
         self.git_model.insert_rows(position, rows)
+        # The following rows are shifted.
+        self.clear_display_cache()
+        # The fetched rows are shifted, not replaced.
+        self._fetched += rows
         self.endInsertRows()
         return True
 
@@ -103,7 +129,7 @@ class QEditableGitModel(QGitModel):
             Removes a given number of rows in the model, starting at the given
             position.
         """
-        parents_index = self.get_columns().index("parents")
+        parents_index = self._schema.column("parents")
 
         commit_to_delete = self.git_model.get_commits()[position]
         # Storing the parents and children commits of the deleted commit.
@@ -124,7 +150,7 @@ class QEditableGitModel(QGitModel):
             self.setData(self.createIndex(row_of_child, parents_index),
                          new_parents)
 
-        children_column = self.get_columns().index("children")
+        children_column = self._schema.column("children")
         for parent in parents:
             row_of_parent = self.git_model.row_of(parent)
             new_children = list(self.git_model.c_data(parent, "children"))
@@ -142,44 +168,52 @@ class QEditableGitModel(QGitModel):
         self.reset()
         return True
 
-    def data(self, index, role):
-        """
-            Returns the data of the model.
-        """
-        if not index.isValid() or not (0 <= index.row() < self.rowCount()):
-            return QVariant()
-
-        if role == Qt.FontRole:
-            return self._data_font(index)
-        else:
-            return QGitModel.data(self, index, role)
-
-    def _data_font(self, index):
+    def _data_font(self, index, column):
         """
             Returns a striked + italic font for items that were deleted.
         """
-        if self.git_model.is_deleted(index):
+        if self.render_state(index.row()).deleted:
             return DELETED_FONT
 
         return QVariant()
 
-    def _data_background(self, index, field_name):
+    def _build_render_state(self, row):
+        """
+            Adds the deleted, conflicting and modified flags to the render
+            state built by QGitModel.
+        """
+        state = QGitModel._build_render_state(self, row)
+        git_model = self.git_model
+        commit = git_model.get_commits()[row]
+        index = self.createIndex(row, 0)
+
+        state.deleted = git_model.is_deleted(index)
+        conflicting_commit = git_model.get_conflicting_commit()
+        state.conflicting = conflicting_commit is not None and \
+                            commit == conflicting_commit
+
+        if self.is_fake_model() or isinstance(commit, DummyCommit):
+            state.modified = (1 << len(self._schema)) - 1
+        else:
+            for field_name in git_model.get_modifications().get(commit, ()):
+                column = self._schema.column(field_name)
+                if git_model.is_modified(self.createIndex(row, column)):
+                    state.modified |= 1 << column
+        return state
+
+    def _data_background(self, index, column):
         """
             Returns a yellow background that should be displayed for the given
             index if the index is modified, or calls the QGitModel method
             instead.
         """
-        commits = self.git_model.get_commits()
-        commit = commits[index.row()]
-        conflicting_commit = self.git_model.get_conflicting_commit()
-
-        modifications = self.git_model.get_modifications()
-        if conflicting_commit is not None and commit == conflicting_commit:
+        state = self.render_state(index.row())
+        if state.conflicting:
             return QVariant(QColor(Qt.red))
-        elif self.git_model.is_modified(index) or self.is_fake_model():
+        elif state.modified & (1 << column):
             return QVariant(QColor(Qt.yellow))
 
-        return QGitModel._data_background(self, index, field_name)
+        return QGitModel._data_background(self, index, column)
 
     def flags(self, index):
         """
@@ -190,11 +224,8 @@ class QEditableGitModel(QGitModel):
                                 Qt.ItemIsDropEnabled |
                                 Qt.NoItemFlags)
 
-        column = index.column()
-        field_name = self.git_model.get_columns()[column]
-
         # Neither first commits nor deleted commits can be edited.
-        if field_name not in NOT_EDITABLE_FIELDS and \
+        if self._schema.is_editable(index.column()) and \
            not self.is_first_commit(index) and\
            not self.is_deleted(index):
             return Qt.ItemFlags(QGitModel.flags(self, index) |
@@ -250,6 +281,7 @@ class QEditableGitModel(QGitModel):
         types.append("application/vnd.text.list")
         return types
 
+    @profiled("dropMimeData")
     def dropMimeData(self, mime_data, action, row, col_unused, parent_unused,
                      filling_empty_model=False):
         if action == Qt.IgnoreAction:
@@ -258,7 +290,7 @@ class QEditableGitModel(QGitModel):
         if not mime_data.hasFormat("application/vnd.text.list"):
             return False
 
-        if not filling_empty_model and row == self.rowCount():
+        if not filling_empty_model and row == self.git_model.row_count():
             # It's forbidden to insert before the first commit (last row of the
             # model).
             return False
@@ -306,8 +338,8 @@ class QEditableGitModel(QGitModel):
 
         self.start_history_event()
 
-        parents_col = self.get_columns().index("parents")
-        children_col = self.get_columns().index("children")
+        parents_col = self._schema.column("parents")
+        children_col = self._schema.column("children")
 
         _row = begin_row
         for item in new_items:
@@ -387,6 +419,7 @@ class QEditableGitModel(QGitModel):
         "See GitModel for more help."
         self.git_model.set_merge(merge_state)
 
+    @profiled("write")
     def write(self, log, force_committed_date, dont_populate=True):
         "See GitModel for more help."
         if log is None:
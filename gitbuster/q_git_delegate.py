@@ -7,10 +7,16 @@
 
 from PyQt4.QtCore import QDateTime, QVariant, Qt, SIGNAL, QRect
 from PyQt4.QtGui import QDateTimeEdit, QItemDelegate, QLineEdit, QTextEdit
-from gfbi_core import ACTOR_FIELDS, TEXT_FIELDS, TIME_FIELDS
+from gitbuster.column_schema import ACTOR_KIND, TEXT_KIND, TIME_KIND
+from gitbuster.filter_proxy_model import source_index
 
 
 class QGitDelegate(QItemDelegate):
+    """
+        Edits the cells of a QGitModel. The view may display the model through
+        a proxy (see FilterProxyModel): the indexes are mapped to the git
+        model first.
+    """
 
     def __init__(self, view):
         QItemDelegate.__init__(self, None)
@@ -21,14 +27,14 @@ class QGitDelegate(QItemDelegate):
         if len(self._view.selectedIndexes()) > 1:
             self._selected_indexes = self._view.selectedIndexes()
 
-        columns = index.model().get_git_model().get_columns()
-        field_name = columns[index.column()]
+        index = source_index(index)
+        kind = index.model().get_schema().kind(index.column())
 
-        if field_name in TEXT_FIELDS:
+        if kind == TEXT_KIND:
             editor = QTextEdit(parent)
-        elif field_name in ACTOR_FIELDS:
+        elif kind == ACTOR_KIND:
             editor = QLineEdit(parent)
-        elif field_name in TIME_FIELDS:
+        elif kind == TIME_KIND:
             editor = QDateTimeEdit(parent)
             editor.setDisplayFormat("yyyy-MM-dd hh:mm:ss")
         else:
@@ -42,11 +48,10 @@ class QGitDelegate(QItemDelegate):
         """
             Here we're gonna make the text edit of the message column bigger.
         """
+        index = source_index(index)
         model = index.model()
-        columns = model.get_git_model().get_columns()
-        field_name = columns[index.column()]
 
-        if field_name != "message":
+        if model.get_schema().kind(index.column()) != TEXT_KIND:
             QItemDelegate.updateEditorGeometry(self, editor, option, index)
             return
 
@@ -64,29 +69,29 @@ class QGitDelegate(QItemDelegate):
             self.emit(SIGNAL("closeEditor(QWidget*)"), editor)
 
     def setEditorData(self, editor, index):
-        columns = index.model().get_git_model().get_columns()
-        field_name = columns[index.column()]
+        index = source_index(index)
+        kind = index.model().get_schema().kind(index.column())
 
-        if field_name in TEXT_FIELDS or field_name in ACTOR_FIELDS:
+        if kind == TEXT_KIND or kind == ACTOR_KIND:
             text = index.model().data(index, Qt.EditRole).toString()
             editor.setText(text)
-        elif field_name in TIME_FIELDS:
+        elif kind == TIME_KIND:
             timestamp, tz = index.model().data(index, Qt.EditRole)
             _q_datetime = QDateTime()
             _q_datetime.setTime_t(timestamp)
             editor.setDateTime(_q_datetime)
 
     def setModelData(self, editor, model, index, ignore_history=False):
+        index = source_index(index)
         model = index.model()
-        columns = model.get_git_model().get_columns()
-        field_name = columns[index.column()]
+        kind = model.get_schema().kind(index.column())
 
-        if field_name in TEXT_FIELDS:
+        if kind == TEXT_KIND:
             data = QVariant(editor.toPlainText())
-        elif field_name in TIME_FIELDS:
+        elif kind == TIME_KIND:
             data = (editor.dateTime().toTime_t(),
                     model.data(index, Qt.EditRole)[1])
-        elif field_name in ACTOR_FIELDS:
+        elif kind == ACTOR_KIND:
             data = QVariant(editor.text())
 
         if not ignore_history:
@@ -103,6 +108,7 @@ class QGitDelegate(QItemDelegate):
             self._selected_indexes = None
 
             for selected_index in selected_indexes:
+                selected_index = source_index(selected_index)
                 if model.is_first_commit(selected_index):
                     continue
 
@@ -5,12 +5,63 @@
 # License: http://www.gnu.org/licenses/gpl-3.0.txt
 #
 
-from PyQt4.QtCore import QAbstractTableModel, QDateTime, QModelIndex, \
-    QVariant, Qt, QMimeData, QDataStream, QByteArray, QIODevice, QString
+from PyQt4.QtCore import QAbstractTableModel, QModelIndex, \
+    QVariant, Qt, QMimeData, QDataStream, QByteArray, QIODevice, QString, \
+    SIGNAL
 from PyQt4.QtGui import QColor
 from datetime import datetime
-from gfbi_core import ACTOR_FIELDS, NAMES, TEXT_FIELDS, TIME_FIELDS
+import time
+from gfbi_core import NAMES
 from gfbi_core.git_model import GitModel
+from gfbi_core.util import Index
+
+from gitbuster.column_schema import ColumnSchema, ACTOR_KIND, HEXSHA_KIND, \
+    OBJECT_KIND, TEXT_KIND, TIME_KIND
+from gitbuster.commit_store import COLUMN_FIELDS, StoredCommit
+from gitbuster.compiled_filter import CompiledFilter
+from gitbuster.profiler import DATA_RECORDS, PROFILER, TRACER, profiled
+
+# The number of rows displayed after a population, and added each time the
+# view needs more rows (see fetchMore).
+FETCH_SIZE = 2000
+
+
+class RenderState(object):
+    """
+        The flags used to paint a row, see QGitModel.render_state. The
+        modified and matched flags are bit fields: bit i is set for column i.
+    """
+    __slots__ = ("pushed", "deleted", "conflicting", "modified", "matched")
+
+    def __init__(self, pushed=False, deleted=False, conflicting=False,
+                 modified=0, matched=0):
+        self.pushed = pushed
+        self.deleted = deleted
+        self.conflicting = conflicting
+        self.modified = modified
+        self.matched = matched
+
+    def __eq__(self, other):
+        return (self.pushed, self.deleted, self.conflicting, self.modified,
+                self.matched) == (other.pushed, other.deleted,
+                                  other.conflicting, other.modified,
+                                  other.matched)
+
+    def __ne__(self, other):
+        return not self == other
+
+
+def unstored_scores(score, values):
+    """
+        Returns the scores of the values read by QGitModel._read_column, 0
+        for the values of the stored commits (None), which are scored by the
+        caller.
+    """
+    scores = [0] * len(values)
+    for offset, value in enumerate(values):
+        if value is not None:
+            scores[offset] = score(value)
+    return scores
 
 
 class QGitModel(QAbstractTableModel):
@@ -37,89 +88,261 @@ class QGitModel(QAbstractTableModel):
         else:
             self.git_model = model
         self._filters = {}
+        # The filters converted to score functions, see get_compiled_filter.
+        self._compiled_filter = None
         self._enabled_options = []
         self._directory = directory
         self._parent = parent
-
-    def populate(self):
+        self._populated = False
+        self._fetched = FETCH_SIZE
+        # The DisplayRole and ToolTipRole values, by (row, column), see
+        # _data_display and _data_tooltip.
+        self._display_cache = {}
+        self._tooltip_cache = {}
+        # The RenderState of the painted rows, by row.
+        self._render_states = {}
+        # The widths of the columns, by font, see get_column_widths.
+        self._column_widths = {}
+        self._schema = ColumnSchema(self.git_model.get_columns())
+        self._display_builders = self._schema.handlers(
+                            {TIME_KIND: self._build_time_display,
+                             TEXT_KIND: self._build_message_display,
+                             HEXSHA_KIND: self._build_hexsha_display},
+                            QVariant)
+        self._role_handlers = {Qt.DisplayRole: self._data_display,
+                               Qt.EditRole: self._data_edit,
+                               Qt.BackgroundColorRole: self._data_background,
+                               Qt.ForegroundRole: self._data_foreground,
+                               Qt.ToolTipRole: self._data_tooltip}
+
+    def populate(self, loader=None):
         """
             Populates the git model, see git_model.GitModel.populate for more
             infos. Moreover, it counts the number of filters that should be
             applied.
+
+            :param loader:
+                A HistoryLoader that already read the history of the model's
+                reference. It is used instead of walking the history again.
+        """
+        self.populate_git_model(loader)
+        self.finish_populate()
+
+    @profiled("populate")
+    def populate_git_model(self, loader=None):
         """
-        self.git_model.populate()
+            Populates the git model only, without resetting the views. Unlike
+            populate(), this can be called outside of the GUI thread.
+        """
+        with TRACER.span("populate", branch=self.name_to_display()):
+            if loader is not None and loader.can_fill(self.git_model):
+                loader.fill(self.git_model)
+            else:
+                self.git_model.populate()
+
+    def finish_populate(self):
+        """
+            Marks the model as populated and resets the views. This is called
+            by populate(), or once the git model has been populated elsewhere
+            (for instance in a LongOperationBox thread).
+        """
+        self._populated = True
+        self._fetched = FETCH_SIZE
         self.reset()
 
+    def reset(self):
+        """
+            Clears the display cache and resets the views.
+        """
+        self.clear_display_cache()
+        QAbstractTableModel.reset(self)
+
+    def clear_display_cache(self, row=None, column=None):
+        """
+            Clears the display cache and the render state of the given row, or
+            of every row.
+
+            :param column:
+                The column that was modified in the row, whose width must be
+                estimated again (see get_column_widths). The widths of every
+                column are forgotten when the whole cache is cleared.
+        """
+        # The widths of the columns depend on the displayed values.
+        if row is None:
+            self._column_widths.clear()
+        elif column is not None:
+            for widths in self._column_widths.values():
+                widths.pop(column, None)
+
+        if row is None:
+            self._display_cache.clear()
+            self._tooltip_cache.clear()
+            self._render_states.clear()
+        else:
+            for column in xrange(self.columnCount()):
+                self._display_cache.pop((row, column), None)
+                self._tooltip_cache.pop((row, column), None)
+            self._render_states.pop(row, None)
+
+    def get_column_widths(self, font_key):
+        """
+            Returns the dict in which the widths of the columns displayed with
+            the given font are cached, by column. It's emptied with the
+            display cache, see util.custom_resize_columns_to_contents.
+        """
+        return self._column_widths.setdefault(font_key, {})
+
+    def render_state(self, row):
+        """
+            Returns the RenderState of the given row, which is used for the
+            background, foreground and font roles. It is computed when the
+            row is first painted, and kept until the row is modified or the
+            model is reset (see clear_display_cache).
+        """
+        state = self._render_states.get(row)
+        if state is None:
+            state = self._render_states[row] = self._build_render_state(row)
+        return state
+
+    def _build_render_state(self, row):
+        commit = self.git_model.get_commits()[row]
+        return RenderState(pushed=self.is_pushed(commit),
+                           matched=self._matched_columns(row))
+
+    def _matched_columns(self, row):
+        """
+            Returns the bit field of the columns of the row that match the
+            filters, when the "filters" option is enabled.
+        """
+        if "filters" not in self._enabled_options or not self._filters:
+            return 0
+
+        matched = 0
+        for column in xrange(len(self._schema)):
+            if self.filter_scores(column, row, row)[0]:
+                matched |= 1 << column
+        return matched
+
+    def refresh_render_states(self):
+        """
+            Computes the render states of the painted rows again, after the
+            filters or the pushed commits changed. dataChanged is only emitted
+            for the rows whose state changed.
+        """
+        changed = []
+        for row, state in self._render_states.items():
+            new_state = self._build_render_state(row)
+            if new_state != state:
+                self._render_states[row] = new_state
+                changed.append(row)
+        changed.sort()
+
+        last_column = self.columnCount() - 1
+        first = 0
+        while first < len(changed):
+            last = first
+            while last + 1 < len(changed) and \
+                  changed[last + 1] == changed[last] + 1:
+                last += 1
+            self.emit(SIGNAL("dataChanged(QModelIndex, QModelIndex)"),
+                      self.createIndex(changed[first], 0),
+                      self.createIndex(changed[last], last_column))
+            first = last + 1
+
+    def is_populated(self):
+        """
+            Returns True if the model has been populated. In lazy mode, models
+            of the branches that weren't displayed yet aren't populated.
+        """
+        return self._populated
+
     def parent(self, index):
         #returns the parent of the model item with the given index.
         return QModelIndex()
 
     def data(self, index, role):
         """
-            Returns the data of the model.
+            Returns the data of the model. The calls are timed by role when
+            the profiler is enabled.
         """
+        if PROFILER.enabled:
+            start_time = time.time()
+            try:
+                return self._data(index, role)
+            finally:
+                PROFILER.record(DATA_RECORDS.get(role, "data(%d)" % role),
+                                time.time() - start_time)
+        return self._data(index, role)
+
+    def _data(self, index, role):
         if not index.isValid() or not (0 <= index.row() < self.rowCount()):
             return QVariant()
 
-        column = index.column()
-        field_name = self.git_model.get_columns()[column]
-
-        if role == Qt.DisplayRole:
-            return self._data_display(index, field_name)
-        elif role == Qt.EditRole:
-            return self._data_edit(index, field_name)
-        elif role == Qt.BackgroundColorRole:
-            return self._data_background(index, field_name)
-        elif role == Qt.ForegroundRole:
-            return self._data_foreground(index, field_name)
-        elif role == Qt.ToolTipRole:
-            return self._data_tooltip(index, field_name)
+        handler = self._role_handlers.get(role)
+        if handler is not None:
+            return handler(index, index.column())
 
         return QVariant()
 
-    def _data_display(self, index, field_name):
-        value = self.git_model.data(index)
-        if field_name in TIME_FIELDS:
-            _tmstmp, _tz = value
-            _datetime = datetime.fromtimestamp(_tmstmp).replace(tzinfo=_tz)
-            if "display_weekday" in self._enabled_options:
-                date_format = "%d/%m/%Y %H:%M:%S (%a)"
-            else:
-                date_format = "%d/%m/%Y %H:%M:%S"
-            return QVariant(_datetime.strftime(date_format))
-        elif field_name == "message":
-            return QVariant(value.split("\n")[0])
-        elif field_name == "hexsha":
-            return QVariant(value[:7])
+    def _data_display(self, index, column):
+        """
+            Returns the displayed value, which is cached until the model is
+            reset or the row is modified (see clear_display_cache).
+        """
+        key = (index.row(), column)
+        display = self._display_cache.get(key)
+        if display is None:
+            display = self._display_cache[key] = \
+                self._display_builders[column](self.git_model.data(index))
+        return display
+
+    def _build_time_display(self, value):
+        _tmstmp, _tz = value
+        _datetime = datetime.fromtimestamp(_tmstmp).replace(tzinfo=_tz)
+        if "display_weekday" in self._enabled_options:
+            date_format = "%d/%m/%Y %H:%M:%S (%a)"
+        else:
+            date_format = "%d/%m/%Y %H:%M:%S"
+        return QVariant(_datetime.strftime(date_format))
 
-        return QVariant(value)
+    def _build_message_display(self, value):
+        return QVariant(value.split("\n")[0])
 
-    def _data_edit(self, index, field_name):
-        value = self.git_model.data(index)
-        if field_name == "message":
-            return QVariant(value)
-        elif field_name in TIME_FIELDS or field_name in ("parents", "tree", "children"):
-            return value
-        return self._data_display(index, field_name)
+    def _build_hexsha_display(self, value):
+        return QVariant(value[:7])
 
-    def _data_background(self, index, field_name):
-        commits = self.git_model.get_commits()
-        commit = commits[index.row()]
+    def _data_edit(self, index, column):
+        kind = self._schema.kind(column)
+        if kind == TEXT_KIND:
+            return QVariant(self.git_model.data(index))
+        elif kind == TIME_KIND or kind == OBJECT_KIND:
+            return self.git_model.data(index)
+        return self._data_display(index, column)
 
-        if self.git_model.is_commit_pushed(commit):
+    def _data_background(self, index, column):
+        if self.render_state(index.row()).pushed:
             return QVariant(QColor(Qt.lightGray))
         return QVariant()
 
-    def _data_foreground(self, index, field_name):
-        if "filters" in self._enabled_options and self.filter_score(index):
+    def _data_foreground(self, index, column):
+        if self.render_state(index.row()).matched & (1 << column):
             return QVariant(QColor(Qt.red))
         return QVariant()
 
-    def _data_tooltip(self, index, field_name):
+    def _data_tooltip(self, index, column):
+        key = (index.row(), column)
+        tooltip = self._tooltip_cache.get(key)
+        if tooltip is None:
+            tooltip = self._tooltip_cache[key] = \
+                                    self._build_tooltip(index, column)
+        return tooltip
+
+    def _build_tooltip(self, index, column):
+        kind = self._schema.kind(column)
         value = self.git_model.data(index)
-        if field_name == "hexsha":
+        if kind == HEXSHA_KIND:
             return QVariant(str(value))
-        elif field_name in TIME_FIELDS:
+        elif kind == TIME_KIND:
             _tmstmp, _tz = value
             _datetime = datetime.fromtimestamp(_tmstmp).replace(tzinfo=_tz)
             if "display_weekday" in self._enabled_options:
@@ -127,8 +350,9 @@ class QGitModel(QAbstractTableModel):
             else:
                 date_format = "%Y-%m-%d %H:%M:%S %Z"
             return QVariant(_datetime.strftime(date_format))
-        elif field_name == "message":
+        elif kind == TEXT_KIND:
             return QVariant(value)
+        return QVariant()
 
     def filter_set(self, model_filter, value):
         """
@@ -140,6 +364,7 @@ class QGitModel(QAbstractTableModel):
                 The value of the filter.
         """
         self._filters[model_filter] = value
+        self._compiled_filter = None
 
     def filter_unset(self, model_filter):
         """
@@ -150,6 +375,16 @@ class QGitModel(QAbstractTableModel):
         """
         if model_filter in self._filters:
             self._filters.pop(model_filter)
+            self._compiled_filter = None
+
+    def get_compiled_filter(self):
+        """
+            Returns the filters converted to score functions, see
+            CompiledFilter. They are converted again after a filter change.
+        """
+        if self._compiled_filter is None:
+            self._compiled_filter = CompiledFilter(self._filters)
+        return self._compiled_filter
 
     def enable_option(self, option):
         """
@@ -160,6 +395,7 @@ class QGitModel(QAbstractTableModel):
         """
         if option not in self._enabled_options:
             self._enabled_options.append(option)
+            self._option_changed(option)
 
     def disable_option(self, option):
         """
@@ -170,6 +406,15 @@ class QGitModel(QAbstractTableModel):
         """
         if option in self._enabled_options:
             self._enabled_options.pop(self._enabled_options.index(option))
+            self._option_changed(option)
+
+    def _option_changed(self, option):
+        if option == "filters":
+            self.refresh_render_states()
+        else:
+            # The other options change the displayed values
+            # (display_weekday).
+            self.clear_display_cache()
 
     def is_enabled(self, option):
         """
@@ -177,148 +422,232 @@ class QGitModel(QAbstractTableModel):
         """
         return option in self._enabled_options
 
-    def date_match(self, item_date):
+    def filter_score(self, index):
         """
-            Returns True if item_date matches the date filters.
+            Returns the number of filters matching the given index.
 
-            :param item_date:
-                The date that will be evaluated.
+            :param index:
+                The index of the item that will be checked against the filters.
         """
-        filters = self._filters
-
-        filter_after_date = None
-        filter_before_date = None
-
-        if "afterDate" in filters:
-            filter_after_date = filters["afterDate"]
-        if "beforeDate" in filters:
-            filter_before_date = filters["beforeDate"]
+        row = index.row()
+        return self.filter_scores(index.column(), row, row)[0]
 
-        if filter_after_date and filter_before_date:
-            if filter_after_date < item_date < filter_before_date:
-                return 1
-        elif (filter_after_date and filter_after_date < item_date):
-            return 1
-        elif (filter_before_date and
-              filter_before_date > item_date):
-            return 1
-
-        return 0
-
-    def weekday_match(self, item_weekday):
+    def filter_scores(self, column, first, last):
         """
-            Returns True if item_weekday matches the weekday filters.
-
-            :param item_weekday:
-                The weekday that will be evaluated.
+            Returns the number of filters matching each row of the given
+            column, from first to last. The values are read a column at a
+            time, see column_values, and scored by the compiled filter.
         """
-        filters = self._filters
-
-        filter_after_weekday = None
-        filter_before_weekday = None
-
-        if "afterWeekday" in filters:
-            filter_after_weekday = filters["afterWeekday"] + 1
-        if "beforeWeekday" in filters:
-            filter_before_weekday = filters["beforeWeekday"] + 1
-
-        if filter_after_weekday and filter_before_weekday:
-            if filter_after_weekday < item_weekday < filter_before_weekday:
-                return 1
-        elif (filter_after_weekday and filter_after_weekday < item_weekday):
-            return 1
-        elif (filter_before_weekday and
-              filter_before_weekday > item_weekday):
-            return 1
+        return self._filter_scores(column, self._row_range(first, last))
 
-        return 0
-
-    def time_match(self, item_time):
+    @profiled("filter_scores")
+    def _filter_scores(self, column, rows):
         """
-            Returns True if item_time matches the time filters.
-
-            :param item_time:
-                The time that will be evaluated.
+            Returns the number of filters matching each of the given rows of
+            the given column, see filter_scores.
         """
-        filters = self._filters
-
-        filter_after_hour = None
-        filter_before_hour = None
+        compiled_filter = self.get_compiled_filter()
+        kind = self._schema.kind(column)
 
-        if "afterHour" in filters:
-            filter_after_hour = filters["afterHour"]
-        if "beforeHour" in filters:
-            filter_before_hour = filters["beforeHour"]
+        if kind == HEXSHA_KIND:
+            if compiled_filter.local_only:
+                is_pushed = self.is_pushed
+                commits = self.git_model.get_commits()
+                return [int(not is_pushed(commits[row])) for row in rows]
+            return [0] * len(rows)
+
+        score = compiled_filter.scorer(kind)
+        if score is None:
+            return [0] * len(rows)
+
+        field_name = self._schema.field(column)
+        if kind == ACTOR_KIND:
+            return self._actor_scores(score, compiled_filter, field_name,
+                                      rows)
+        elif kind == TEXT_KIND and field_name == "message":
+            return self._message_scores(score, compiled_filter, field_name,
+                                        rows)
+        elif kind != TIME_KIND:
+            return [score(value) for value in
+                    self._column_values(field_name, rows)]
+
+        # The dates of the stored commits are scored from the calendar
+        # columns of their store, the others one at a time.
+        values, offsets, positions, store = self._read_column(field_name,
+                                                              rows)
+        scores = unstored_scores(score, values)
+        if positions:
+            stored_scores = compiled_filter.score_calendar(
+                                    store.calendar(field_name), positions)
+            for offset, stored_score in zip(offsets, stored_scores):
+                scores[offset] = stored_score
+        return scores
+
+    def _actor_scores(self, score, compiled_filter, field_name, rows):
+        """
+            Returns the scores of the name/email filter. The actors of the
+            stored commits are matched once per actor, see
+            CompiledFilter.matching_actors, the other values (edited) one at a
+            time.
+        """
+        values, offsets, positions, store = self._read_column(field_name,
+                                                              rows)
+        scores = unstored_scores(score, values)
+        if positions:
+            matching = compiled_filter.matching_actors(store, field_name)
+            actor_column = store.actor_column(field_name)
+            for offset, position in zip(offsets, positions):
+                scores[offset] = int(actor_column[position] in matching)
+        return scores
+
+    def _message_scores(self, score, compiled_filter, field_name, rows):
+        """
+            Returns the scores of the message filter. The unmodified messages
+            of the stored commits are first looked up in the indexes of their
+            store (see CompiledFilter.message_candidates), only the candidates
+            are matched by the regexp. The others (edited or not indexed yet)
+            are matched by the regexp.
+        """
+        values, offsets, positions, store = self._read_column(field_name,
+                                                              rows)
+        scores = unstored_scores(score, values)
+        if not positions:
+            return scores
+
+        found = compiled_filter.message_candidates(store)
+        get_message = store.messages.get
+        if found is None:
+            for offset, position in zip(offsets, positions):
+                scores[offset] = score(get_message(position))
+            return scores
+
+        candidates, indexed, exact = found
+        for offset, position in zip(offsets, positions):
+            if position >= indexed:
+                scores[offset] = score(get_message(position))
+            elif position in candidates:
+                if exact:
+                    scores[offset] = 1
+                else:
+                    scores[offset] = score(get_message(position))
+        return scores
+
+    @profiled("match_rows")
+    def match_rows(self, columns, total_score, rows):
+        """
+            Returns True for each of the given rows whose scores, added over
+            the given columns, reach total_score. The columns no filter
+            applies to aren't read.
+
+            :param rows:
+                A sequence of rows, for instance a xrange or the rows matched
+                by a previous filter.
+        """
+        count = len(rows)
+        if not total_score:
+            return [True] * count
+
+        compiled_filter = self.get_compiled_filter()
+        scored_columns = []
+        for column in columns:
+            kind = self._schema.kind(column)
+            if compiled_filter.scorer(kind) is not None or \
+               (kind == HEXSHA_KIND and compiled_filter.local_only):
+                scored_columns.append(column)
+
+        if not scored_columns:
+            return [False] * count
+
+        columns_scores = [self._filter_scores(column, rows)
+                          for column in scored_columns]
+        return [sum(row_scores) >= total_score
+                for row_scores in zip(*columns_scores)]
+
+    def is_pushed(self, commit):
+        """
+            Returns True if the commit is pushed. For the stored commits, this
+            is the pushed column of the CommitStore (the commit is reachable
+            from a remote reference). The other commits are checked by the git
+            model.
+        """
+        if isinstance(commit, StoredCommit):
+            return commit.get_store().pushed[commit.get_position()]
+        return self.git_model.is_commit_pushed(commit)
+
+    def pushed_changed(self):
+        """
+            Repaints the rows after some commits were pushed, see is_pushed.
+        """
+        self.refresh_render_states()
+
+    def column_values(self, field_name, first, last):
+        """
+            Returns the values of a field for the rows from first to last.
+            The dates are returned as timestamps.
+
+            The unmodified values of the stored commits are read from the
+            columns of the CommitStore, the others from the git model.
+        """
+        return self._column_values(field_name, self._row_range(first, last))
+
+    def _column_values(self, field_name, rows):
+        """
+            Returns the values of a field for the given rows, see
+            column_values.
+        """
+        values, offsets, positions, store = self._read_column(field_name,
+                                                              rows)
+        if positions:
+            for offset, value in zip(offsets,
+                                     store.column(field_name, positions)):
+                values[offset] = value
+
+        return values
+
+    def _row_range(self, first, last):
+        """
+            Returns the rows from first to last, without the rows after the
+            last row of the git model.
+        """
+        return xrange(first, min(last + 1, self.git_model.row_count()))
 
-        if filter_after_hour and filter_before_hour:
-            if filter_after_hour < item_time < filter_before_hour:
-                return 1
-        elif (filter_after_hour and filter_after_hour < item_time):
-            return 1
-        elif (filter_before_hour and
-              filter_before_hour > item_time):
-            return 1
+    def _read_column(self, field_name, rows):
+        """
+            Returns the values of a field for the given rows that can't be
+            read from the CommitStore, and where to read the others:
 
-        return 0
+                values, offsets, positions, store
 
-    def filter_score(self, index):
+            The values of the stored commits are None in values, their offsets
+            (in rows) and positions in the store are in the two lists.
         """
-            Returns the number of filters matching the given index.
+        git_model = self.git_model
+        column = self._schema.column(field_name)
+        is_time = self._schema.kind(column) == TIME_KIND
+        commits = git_model.get_commits()
+        modifications = {}
+        if hasattr(git_model, "get_modifications"):
+            modifications = git_model.get_modifications()
 
-            :param index:
-                The index of the item that will be checked against the filters.
-        """
-        column = index.column()
-        field_name = self.git_model.get_columns()[column]
-        filters = self._filters
-
-        if field_name in TIME_FIELDS:
-            filters = self._filters
-            timestamp, tz = self.git_model.data(index)
-            _q_datetime = QDateTime()
-            _q_datetime.setTime_t(timestamp)
-
-            item_date = _q_datetime.date()
-            item_weekday = item_date.dayOfWeek()
-            item_time = _q_datetime.time()
-
-            date_time_filters = ("afterWeekday", "beforeWeekday",
-                                 "beforeDate", "afterDate",
-                                 "beforeHour", "afterHour")
-            has_date_time_filter = False
-            for model_filter in filters:
-                if model_filter in date_time_filters:
-                    has_date_time_filter = True
-
-            if not has_date_time_filter:
-                return 0
+        values = [None] * len(rows)
+        offsets = []
+        positions = []
+        store = None
+        for offset, row in enumerate(rows):
+            commit = commits[row]
+            if isinstance(commit, StoredCommit) and \
+               field_name in COLUMN_FIELDS and \
+               field_name not in modifications.get(commit, ()):
+                store = commit.get_store()
+                offsets.append(offset)
+                positions.append(commit.get_position())
             else:
-                return self.date_match(item_date) + \
-                       self.weekday_match(item_weekday) + \
-                       self.time_match(item_time)
-
-        elif field_name in ACTOR_FIELDS:
-            if "nameEmail" in filters:
-                regexp = filters["nameEmail"]
-                value = self.git_model.data(index)
-                if regexp.isValid() and regexp.indexIn(value) != -1:
-                    return 1
-
-        elif field_name in TEXT_FIELDS:
-            if "message" in filters:
-                regexp = filters["message"]
-                commit_message = self.git_model.data(index)
-                if regexp.isValid() and regexp.indexIn(commit_message) != -1:
-                    return 1
-
-        elif field_name == "hexsha":
-            if "localOnly" in filters:
-                commits = self.git_model.get_commits()
-                commit = commits[index.row()]
-                if not self.git_model.is_commit_pushed(commit):
-                    return 1
+                value = git_model.data(Index(row, column))
+                if is_time:
+                    value = value[0]
+                values[offset] = value
 
-        return 0
+        return values, offsets, positions, store
 
     def headerData(self, section, orientation, role=Qt.DisplayRole):
         """
@@ -332,8 +661,7 @@ class QGitModel(QAbstractTableModel):
         if role != Qt.DisplayRole:
             return QVariant()
         if orientation == Qt.Horizontal:
-            field_name = self.git_model.get_columns()[section]
-            return QVariant(NAMES[field_name])
+            return QVariant(NAMES[self._schema.field(section)])
 
         return QVariant(int(section + 1))
 
@@ -393,8 +721,37 @@ class QGitModel(QAbstractTableModel):
         return self.git_model
 
     def rowCount(self, parent=QModelIndex()):
-        "See GitModel for more help."
-        return self.git_model.row_count()
+        """
+            Returns the number of rows fetched by the views, see fetchMore.
+        """
+        return min(self._fetched, self.git_model.row_count())
+
+    def canFetchMore(self, parent=QModelIndex()):
+        """
+            Returns True if some rows of the git model aren't shown yet.
+        """
+        return self._fetched < self.git_model.row_count()
+
+    def fetchMore(self, parent=QModelIndex()):
+        """
+            Shows the next FETCH_SIZE rows of the git model. This is called by
+            the views when they are scrolled to the last row, so that very long
+            branches don't have to be laid out at once.
+        """
+        self.fetch_until(self._fetched + FETCH_SIZE - 1)
+
+    def fetch_until(self, row):
+        """
+            Makes sure the given row is shown by the views.
+        """
+        first = self.rowCount()
+        last = min(row, self.git_model.row_count() - 1)
+        if last < first:
+            return
+
+        self.beginInsertRows(QModelIndex(), first, last)
+        self._fetched = last + 1
+        self.endInsertRows()
 
     def columnCount(self, parent=QModelIndex()):
         "See GitModel for more help."
@@ -423,13 +780,25 @@ class QGitModel(QAbstractTableModel):
         self.reset()
 
     def row_of(self, commit):
-        "See GitModel for more help."
-        return self.git_model.row_of(commit)
+        """
+            Returns the row of the given commit, which is fetched if it wasn't
+            shown yet. See GitModel for more help.
+        """
+        row = self.git_model.row_of(commit)
+        self.fetch_until(row)
+        return row
 
     def get_columns(self):
         "See GitModel for more help."
         return self.git_model.get_columns()
 
+    def get_schema(self):
+        """
+            Returns the ColumnSchema of the model, which should be used
+            instead of get_columns() in the per-cell code.
+        """
+        return self._schema
+
     def get_old_branch_name(self):
         "See GitModel for more help."
         return self.git_model.get_old_branch_name()
@@ -11,8 +11,8 @@ from PyQt4.QtGui import QApplication, QCheckBox, QGridLayout, QKeySequence,\
      QFont
 connect = QObject.connect
 
-from gitbuster.conflicts_dialog import ConflictsDialog
-from gitbuster.util import SetNameAction, DummyRemoveAction
+from gitbuster.util import SetNameAction, DummyRemoveAction, \
+                           PLACEHOLDER_FONT, PLACEHOLDER_TOOLTIP
 from gitbuster.branch_view import BranchView
 
 
@@ -77,6 +77,9 @@ class RebaseMainClass(QWidget):
                                             None, QApplication.UnicodeUTF8))
         self._ui.branchCheckboxLayout.addWidget(checkbox, position / 2,
                                                        position%2, 1, 1)
+        if not model.is_populated():
+            checkbox.setFont(PLACEHOLDER_FONT)
+            checkbox.setToolTip(PLACEHOLDER_TOOLTIP)
 
         branch_view = BranchView(self, model, checkbox, self._models)
         self._ui.viewLayout.addWidget(branch_view, 0, self._number_of_models)
@@ -137,11 +140,16 @@ class RebaseMainClass(QWidget):
         for item in [view_layout.itemAt(id)
                      for id in xrange(view_layout.count())
                      if view_layout.itemAt(id).widget() == branch_view]:
-            print "Hiding", item.widget()
             item.widget().hide()
             item.widget().close()
             view_layout.removeItem(item)
 
+        checkbox_layout = self._ui.branchCheckboxLayout
+        checkbox_layout.removeWidget(checkbox)
+        checkbox.hide()
+        checkbox.close()
+        del self._checkboxes[checkbox]
+
     def remove_rows(self):
         """
             This forwards the remove row command to the focused branch view.
@@ -157,9 +165,22 @@ class RebaseMainClass(QWidget):
             if branch_view.tableview_has_focus():
                 return branch_view
 
+    def model_populated(self, model):
+        """
+            The given model has been populated, its placeholder checkbox is
+            replaced by a regular one.
+        """
+        for checkbox, (branch_view, _model) in self._checkboxes.items():
+            if _model == model:
+                checkbox.setFont(QFont())
+                checkbox.setToolTip("")
+                branch_view.resize_table_view()
+
     def checkbox_clicked(self, value):
         checkbox = self.sender()
         branch_view, model = self._checkboxes[checkbox]
+        if value:
+            self._parent.populate_model(model)
         branch_view.setVisible(value)
 
     def commit_clicked(self, index):
@@ -176,7 +197,7 @@ class RebaseMainClass(QWidget):
             'message':          self._ui.messageHolderTextEdit}
 
         for field in labels:
-            column = model.get_columns().index(field)
+            column = model.get_schema().column(field)
             index = model.createIndex(row, column)
 
             if "date" in field:
@@ -236,6 +257,7 @@ class RebaseMainClass(QWidget):
         model = self._clicked_commit.model()
 
         unmerged_files = model.get_unmerged_files()
+        from gitbuster.conflicts_dialog import ConflictsDialog
         dialog = ConflictsDialog(unmerged_files, parent=self._parent)
         ret = dialog.exec_()
 
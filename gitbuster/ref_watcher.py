@@ -0,0 +1,180 @@
+# ref_watcher.py
+# Copyright (C) 2011 Julien Miotte <miotte.julien@gmail.com>
+#
+# This module is part of gitbuster and is released under the GPLv3
+# License: http://www.gnu.org/licenses/gpl-3.0.txt
+#
+
+import os
+
+from PyQt4.QtCore import QFileSystemWatcher, QObject, QTimer, SIGNAL
+
+# The changes happening during this delay (in milliseconds) are batched, git
+# usually writes several files when it updates a reference.
+BATCH_DELAY = 300
+# Delay between two checks when the file system can't be watched, in
+# milliseconds.
+POLL_INTERVAL = 2000
+
+
+class RefWatcher(QObject):
+    """
+        Watches the references of a repository: HEAD, packed-refs, and the
+        branches and remote references stored in refs/heads and refs/remotes.
+
+        The directories are watched (git replaces the reference files instead
+        of writing them), with inotify when it's available. If the directories
+        can't be watched, the references are polled instead. In both cases,
+        the "refsChanged" signal is only emitted if the references really
+        changed, so that unrelated changes in the .git directory (the index
+        for instance) are ignored.
+
+        The references are compared by the modification time, size and inode
+        of their files, without reading them: git replaces a reference file
+        when it updates it.
+    """
+
+    def __init__(self, git_dir, parent=None):
+        """
+            :param git_dir:
+                The .git directory of the repository.
+        """
+        QObject.__init__(self, parent)
+        self._git_dir = git_dir
+        self._ref_dirs = [os.path.join(git_dir, "refs", "heads"),
+                          os.path.join(git_dir, "refs", "remotes")]
+        # The references stored at the top of the .git directory.
+        self._top_files = [os.path.join(git_dir, "HEAD"),
+                           os.path.join(git_dir, "packed-refs")]
+        self._signature = None
+        self._top_signature = None
+        self._suspended = False
+
+        self._watcher = QFileSystemWatcher(self)
+        self.connect(self._watcher, SIGNAL("directoryChanged(const QString&)"),
+                     self.directory_changed)
+
+        self._batch_timer = QTimer(self)
+        self._batch_timer.setSingleShot(True)
+        self.connect(self._batch_timer, SIGNAL("timeout()"), self.check)
+
+        self._poll_timer = QTimer(self)
+        self.connect(self._poll_timer, SIGNAL("timeout()"), self.check)
+
+    def start(self):
+        """
+            Starts watching the references.
+        """
+        self._signature = self.signature()
+        self._top_signature = self._stats(self._top_files)
+        self._watch_directories()
+        if not self._watcher.directories():
+            self._poll_timer.start(POLL_INTERVAL)
+
+    def stop(self):
+        """
+            Stops watching the references.
+        """
+        self._batch_timer.stop()
+        self._poll_timer.stop()
+        directories = self._watcher.directories()
+        if directories:
+            self._watcher.removePaths(directories)
+
+    def suspend(self):
+        """
+            Ignores the changes until resume() is called. This is used while
+            gitbuster writes the references itself.
+        """
+        self._suspended = True
+
+    def resume(self):
+        """
+            Starts emitting "refsChanged" again. The changes that happened
+            while the watcher was suspended are ignored.
+        """
+        self._suspended = False
+        self._signature = self.signature()
+
+    def directory_changed(self, directory):
+        """
+            Called when one of the watched directories changed. The check is
+            delayed so that the following changes are batched.
+        """
+        if os.path.normpath(unicode(directory)) == \
+           os.path.normpath(self._git_dir):
+            # The index, ORIG_HEAD, the objects... are written in the .git
+            # directory too: only HEAD and packed-refs matter.
+            top_signature = self._stats(self._top_files)
+            if top_signature == self._top_signature:
+                return
+            self._top_signature = top_signature
+
+        # New references may live in new directories (refs/heads/feature/x).
+        self._watch_directories()
+        self._batch_timer.start(BATCH_DELAY)
+
+    def check(self):
+        """
+            Emits "refsChanged" if the references changed since the last
+            check.
+        """
+        if self._suspended:
+            return
+
+        signature = self.signature()
+        if signature != self._signature:
+            self._signature = signature
+            self.emit(SIGNAL("refsChanged"))
+
+    def signature(self):
+        """
+            Returns a value that changes when the references change: the
+            modification time, size and inode of HEAD, packed-refs and the
+            reference files.
+        """
+        return self._stats(self._top_files + self._branch_files())
+
+    def _stats(self, paths):
+        """
+            Returns the modification time, size and inode of the given files,
+            by path. The missing files are left out.
+        """
+        stats = {}
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # The file was removed since we listed it, or packed-refs
+                # doesn't exist.
+                continue
+            stats[path] = (stat.st_mtime, stat.st_size, stat.st_ino)
+        return stats
+
+    def _branch_files(self):
+        """
+            Returns the paths of the files in refs/heads and refs/remotes.
+        """
+        paths = []
+        for ref_dir in self._ref_dirs:
+            for directory, dirnames, filenames in os.walk(ref_dir):
+                paths.extend(os.path.join(directory, filename)
+                             for filename in filenames
+                             if not filename.endswith(".lock"))
+        return paths
+
+    def _watch_directories(self):
+        """
+            Watches the .git directory and every directory of refs/heads and
+            refs/remotes that isn't watched yet.
+        """
+        directories = [self._git_dir]
+        for ref_dir in self._ref_dirs:
+            for directory, dirnames, filenames in os.walk(ref_dir):
+                directories.append(directory)
+
+        watched = set(unicode(directory)
+                      for directory in self._watcher.directories())
+        for directory in directories:
+            if directory not in watched and os.path.isdir(directory):
+                self._watcher.addPath(directory)
@@ -0,0 +1,259 @@
+# trigram_index.py
+# Copyright (C) 2011 Julien Miotte <miotte.julien@gmail.com>
+#
+# This module is part of gitbuster and is released under the GPLv3
+# License: http://www.gnu.org/licenses/gpl-3.0.txt
+#
+
+from array import array
+from threading import Lock
+
+# The number of values indexed between two releases of the lock, see
+# TrigramIndex.update.
+UPDATE_BATCH = 2000
+# The characters with a meaning in a regexp, see pattern_literals.
+_SPECIAL_CHARACTERS = "()[]{}.^$*+?|\\"
+
+
+def trigrams(text):
+    """
+        Returns the set of the substrings of 3 characters of the text.
+    """
+    return set(text[start:start + 3] for start in xrange(len(text) - 2))
+
+
+def is_literal(pattern):
+    """
+        Returns True if the regexp pattern has no special character: it only
+        matches the texts containing it.
+    """
+    for char in pattern:
+        if char in _SPECIAL_CHARACTERS:
+            return False
+    return True
+
+
+def pattern_narrows(previous, pattern):
+    """
+        Returns True if the texts matched by the regexp pattern are matched by
+        the previous pattern too: both are plain texts (see is_literal) and
+        the pattern contains the previous one.
+    """
+    return is_literal(previous) and is_literal(pattern) and \
+           previous in pattern
+
+
+def pattern_literals(pattern):
+    """
+        Returns strings that every text matched by the regexp pattern
+        contains, or an empty list if they can't be found (the text then
+        has to be matched against the regexp in any case).
+
+        The pattern is read conservatively: the groups, the character
+        classes, the escape sequences and the optional characters end the
+        literal strings, and nothing is returned if there is an alternation.
+    """
+    if "|" in pattern:
+        return []
+
+    literals = []
+    current = []
+    position = 0
+    length = len(pattern)
+    while position < length:
+        char = pattern[position]
+        position += 1
+
+        if char == "\\":
+            if position < length and not pattern[position].isalnum():
+                # An escaped special character.
+                char = pattern[position]
+                position += 1
+            else:
+                # \w, \b, \n, \x41, \1...: skip the escape sequence.
+                position = _skip_escape(pattern, position)
+                literals.append(u"".join(current))
+                current = []
+                continue
+
+        elif char in _SPECIAL_CHARACTERS:
+            literals.append(u"".join(current))
+            current = []
+            closing = {"(": ")", "[": "]", "{": "}"}.get(char)
+            if closing is not None:
+                position = _skip_to(pattern, position, char, closing)
+            continue
+
+        if position < length and pattern[position] in "?*{":
+            # The character is optional.
+            literals.append(u"".join(current))
+            current = []
+        elif position < length and pattern[position] == "+":
+            # The character is repeated: the literal ends with its first
+            # occurrence.
+            current.append(char)
+            literals.append(u"".join(current))
+            current = []
+        else:
+            current.append(char)
+
+    literals.append(u"".join(current))
+    return [literal for literal in literals if len(literal) >= 3]
+
+
+def _skip_escape(pattern, position):
+    """
+        Returns the position following the escape sequence whose backslash
+        was found just before the given position.
+    """
+    if position >= len(pattern):
+        return position
+
+    char = pattern[position]
+    position += 1
+    if char in "xX":
+        digits = "0123456789abcdefABCDEF"
+        limit = position + 4
+    elif char.isdigit():
+        digits = "0123456789"
+        limit = len(pattern)
+    else:
+        return position
+
+    while position < min(limit, len(pattern)) and pattern[position] in digits:
+        position += 1
+    return position
+
+
+def _skip_to(pattern, position, opening, closing):
+    """
+        Returns the position following the closing character matching an
+        opening character found just before the given position.
+    """
+    if opening == "[":
+        # A "]" at the beginning of a character class (after the "^" of a
+        # negated class) is a member of the class.
+        if position < len(pattern) and pattern[position] == "^":
+            position += 1
+        if position < len(pattern) and pattern[position] == "]":
+            position += 1
+
+    depth = 1
+    while position < len(pattern) and depth:
+        char = pattern[position]
+        if char == "\\":
+            position += 1
+        elif char == closing:
+            depth -= 1
+        elif char == opening and opening != "[":
+            depth += 1
+        position += 1
+    return position
+
+
+class TrigramIndex:
+    """
+        An index of the trigrams (substrings of 3 characters) of a growing
+        list of strings: for each trigram, the positions of the strings
+        containing it.
+
+        A text can only be found in the strings containing all its trigrams,
+        so searching the strings containing some literals is an intersection
+        of the postings of their trigrams. The candidates must then be
+        matched for real: they may contain the trigrams in another order.
+
+        Like the WordIndex, update() indexes the strings added since the last
+        call, and the strings that aren't indexed yet must be searched by the
+        caller. The postings are arrays of ints: a long message has a few
+        hundred trigrams.
+    """
+
+    def __init__(self, count, get):
+        """
+            :param count:
+                A function returning the number of strings.
+            :param get:
+                A function returning the string at a given position.
+        """
+        self._count = count
+        self._get = get
+        self._postings = {}
+        self._indexed = 0
+        self._stopped = False
+        self._lock = Lock()
+        # The last search, see search().
+        self._last_search = None
+
+    def indexed_count(self):
+        """
+            Returns the number of indexed strings: the strings at the
+            positions below this one are indexed.
+        """
+        return self._indexed
+
+    def is_outdated(self):
+        """
+            Returns True if some strings aren't indexed yet.
+        """
+        return self._indexed < self._count()
+
+    def update(self):
+        """
+            Indexes the strings added since the last call. This can be run
+            outside of the GUI thread.
+        """
+        while self.is_outdated() and not self._stopped:
+            self._lock.acquire()
+            try:
+                first = self._indexed
+                last = min(first + UPDATE_BATCH, self._count())
+                postings = self._postings
+                for position in xrange(first, last):
+                    for trigram in trigrams(self._get(position)):
+                        if trigram not in postings:
+                            postings[trigram] = array("i")
+                        postings[trigram].append(position)
+                self._indexed = last
+            finally:
+                self._lock.release()
+
+    def stop(self):
+        """
+            Makes a running update() return after the current batch of
+            strings, and the next ones return at once (when gitbuster is
+            closed).
+        """
+        self._stopped = True
+
+    def search(self, literals):
+        """
+            Returns the positions of the indexed strings that may contain all
+            the given literals (of 3 characters or more), and the number of
+            indexed strings when the search was done:
+
+                candidates, indexed_count
+        """
+        self._lock.acquire()
+        try:
+            key = (tuple(literals), self._indexed)
+            if self._last_search is not None and self._last_search[0] == key:
+                return self._last_search[1]
+
+            needed = set()
+            for literal in literals:
+                needed.update(trigrams(literal))
+
+            # The smallest postings first, the intersection only shrinks.
+            postings = sorted((self._postings.get(trigram, ())
+                               for trigram in needed), key=len)
+            candidates = set(postings[0])
+            for trigram_postings in postings[1:]:
+                if not candidates:
+                    break
+                candidates.intersection_update(trigram_postings)
+
+            result = (candidates, self._indexed)
+            self._last_search = (key, result)
+            return result
+        finally:
+            self._lock.release()
@@ -7,13 +7,38 @@
 
 from os.path import exists, join
 from pprint import pprint
+import os
 import time
 
 from PyQt4.QtCore import QDir, QObject, QSettings, QVariant, SIGNAL, QUrl,\
         QStringList, QString, Qt, QThread
-from PyQt4.QtGui import QFileDialog, QFontMetrics, QDialog
+from PyQt4.QtGui import QFileDialog, QFont, QFontMetrics, QDialog, \
+        QHeaderView
 
+from gitbuster.filter_proxy_model import source_model
 from gitbuster.long_operation_box_ui import Ui_LongOperationBox
+from gitbuster.profiler import PROFILER, TRACER
+
+
+# Used to display the branches whose model isn't populated yet (lazy mode).
+PLACEHOLDER_FONT = QFont()
+PLACEHOLDER_FONT.setItalic(True)
+PLACEHOLDER_TOOLTIP = "Not loaded yet, select the branch to load it."
+
+# If this environment variable is set, the main window prints the time
+# elapsed since the start of the process when it's first painted, and quits.
+# See tests/startup_benchmark.py.
+STARTUP_BENCHMARK = "GITBUSTER_STARTUP_BENCHMARK"
+
+# The number of rows measured to set the width of the name columns.
+NAME_SAMPLES = 30
+# The space added to the height of the font for the height of the rows of the
+# views, see set_fixed_row_height().
+ROW_MARGIN = 6
+# The QFontMetrics and the measured text widths of the fonts used by the
+# views, by font key, see text_width().
+_FONT_METRICS = {}
+_TEXT_WIDTHS = {}
 
 
 def _connect_button(button, function):
@@ -26,6 +51,24 @@ def is_top_git_directory(filepath):
     return exists(git_path)
 
 
+def process_start_time():
+    """
+        Returns the time at which the current process was started, read in
+        /proc (Linux only), or None if it can't be found.
+    """
+    try:
+        stat = open("/proc/self/stat").read()
+        uptime = float(open("/proc/uptime").read().split()[0])
+        # The 22nd field is the start time, in clock ticks after the boot.
+        # The second field (the command name) may contain spaces.
+        start_ticks = float(stat.rsplit(")", 1)[1].split()[19])
+        clock_ticks = os.sysconf("SC_CLK_TCK")
+    except (IOError, OSError, ValueError, IndexError):
+        return None
+
+    return time.time() - uptime + start_ticks / clock_ticks
+
+
 def select_git_directory():
     settings = QSettings("majerti", "gitbuster")
     settings.beginGroup("Last run")
@@ -82,35 +125,74 @@ def select_git_directory():
 
 
 def custom_resize_columns_to_contents(view):
-
-    model = view.model()
+    """
+        Sets the width of the columns of the view from their contents. The
+        widths are cached by the model (see QGitModel.get_column_widths), so
+        that showing or hiding columns doesn't measure the cells again.
+    """
+    model = source_model(view.model())
     font = view.font()
+    widths = model.get_column_widths(unicode(font.key()))
 
+    for column, field in enumerate(model.get_columns()):
+        if column not in widths:
+            widths[column] = estimate_column_width(model, column, field, font)
+        view.setColumnWidth(column, widths[column])
+
+
+def set_fixed_row_height(view):
+    """
+        Gives the same height to every row of the view, from the height of
+        its font. The rows are never resized to their contents, so that the
+        view doesn't ask the size of the cells of each row of big histories.
+    """
+    header = view.verticalHeader()
+    header.setResizeMode(QHeaderView.Fixed)
+    header.setDefaultSectionSize(QFontMetrics(view.font()).height() +
+                                 ROW_MARGIN)
+
+
+def estimate_column_width(model, column, field, font):
+    """
+        Returns the width of the given column: the width of the longest of
+        the 30 first names for the name columns, the width of the first
+        value for the others, with a margin.
+    """
     MAGIC_NUMBERS = {"hexsha": 1.4,
                      "authored_date" : 1.1,
                      "committed_date" : 1.1}
 
-    for column, field in enumerate(model.get_columns()):
-        # Use QFontMetrics to find out the proper size.
-        if "name" in field:
-            width_set = []
-            for row in xrange(30):
-                item = model.data(model.createIndex(row, column), Qt.DisplayRole)
-                metrics = QFontMetrics(font)
-                width = metrics.width(item.toString())
-                width_set.append(width)
-            width = max(width_set)
-        else:
-            item = model.data(model.createIndex(0, column), Qt.DisplayRole)
-            metrics = QFontMetrics(font)
-            width = metrics.width(item.toString())
+    if "name" in field:
+        last = min(NAME_SAMPLES, model.rowCount()) - 1
+        values = model.column_values(field, 0, last)
+        width = max([text_width(font, value) for value in values] or [0])
+    else:
+        item = model.data(model.createIndex(0, column), Qt.DisplayRole)
+        width = text_width(font, unicode(item.toString()))
 
-        if field in MAGIC_NUMBERS:
-            magic = MAGIC_NUMBERS[field]
-        else:
-            magic = 1.2
+    if field in MAGIC_NUMBERS:
+        magic = MAGIC_NUMBERS[field]
+    else:
+        magic = 1.2
+
+    return int(width * magic)
+
+
+def text_width(font, text):
+    """
+        Returns the width of the text displayed with the given font. There
+        is one QFontMetrics per font, and the widths are cached: the names
+        are the same on most rows.
+    """
+    key = unicode(font.key())
+    if key not in _FONT_METRICS:
+        _FONT_METRICS[key] = QFontMetrics(font)
+        _TEXT_WIDTHS[key] = {}
 
-        view.setColumnWidth(column, int(width * magic))
+    widths = _TEXT_WIDTHS[key]
+    if text not in widths:
+        widths[text] = _FONT_METRICS[key].width(text)
+    return widths[text]
 
 
 class SetNameAction:
@@ -151,7 +233,11 @@ class DummyRemoveAction:
 
 
 class Timer:
-    records = {}
+    """
+        Times an operation until stop() is called, and adds it to the records
+        of the profiler (see gitbuster.profiler), even if the profiler isn't
+        enabled.
+    """
 
     def __init__(self, record=None):
         if record is None:
@@ -160,13 +246,10 @@ class Timer:
         self._start_time = time.time()
 
     def stop(self):
-        if not self._record in self.records:
-            self.records[self._record] = []
-        self.records[self._record].append("%.4f" %
-                                          (time.time() - self._start_time))
+        PROFILER.record(self._record, time.time() - self._start_time)
 
     def render_records(self):
-        pprint(self.records)
+        pprint(PROFILER.get_records())
 
 class RunLongOperation(QThread):
 
@@ -241,5 +324,6 @@ def run_long_operation(text, operation, args=[], kwargs={},
                                     operation, args=args, kwargs=kwargs,
                                     progress_method=progress_method,
                                     parent=parent)
-        long_box.exec_()
+        with TRACER.span(text):
+            long_box.exec_()
         return long_box.result()
@@ -0,0 +1,116 @@
+# word_index.py
+# Copyright (C) 2011 Julien Miotte <miotte.julien@gmail.com>
+#
+# This module is part of gitbuster and is released under the GPLv3
+# License: http://www.gnu.org/licenses/gpl-3.0.txt
+#
+
+from array import array
+from threading import Lock
+import re
+
+# The words of the messages: the longest runs of letters, digits and
+# underscores.
+WORD = re.compile(r"\w+", re.UNICODE)
+# The number of messages indexed between two releases of the lock, see
+# WordIndex.update.
+UPDATE_BATCH = 5000
+
+
+def is_word(text):
+    """
+        Returns True if the given text is made of word characters only, see
+        WORD. Such a text can only be found inside the words of a message.
+    """
+    match = WORD.match(text)
+    return match is not None and match.end() == len(text)
+
+
+class WordIndex:
+    """
+        An inverted index of the words of the messages of a CommitStore: for
+        each word, the positions of the messages containing it.
+
+        The messages of the store never change (the edited messages are kept
+        by the models), so the index only grows: update() indexes the
+        messages added since the last call. It is run in the background, the
+        messages that aren't indexed yet must be searched by the caller.
+    """
+
+    def __init__(self, messages):
+        """
+            :param messages:
+                The StringPool holding the messages of the store.
+        """
+        self._messages = messages
+        self._postings = {}
+        self._indexed = 0
+        self._stopped = False
+        self._lock = Lock()
+        # The last search, see search().
+        self._last_search = None
+
+    def indexed_count(self):
+        """
+            Returns the number of indexed messages: the messages at the
+            positions below this one are indexed.
+        """
+        return self._indexed
+
+    def is_outdated(self):
+        """
+            Returns True if some messages of the store aren't indexed yet.
+        """
+        return self._indexed < len(self._messages)
+
+    def update(self):
+        """
+            Indexes the messages added to the store since the last call. This
+            can be run outside of the GUI thread.
+        """
+        while self.is_outdated() and not self._stopped:
+            self._lock.acquire()
+            try:
+                first = self._indexed
+                last = min(first + UPDATE_BATCH, len(self._messages))
+                postings = self._postings
+                for position in xrange(first, last):
+                    message = self._messages.get(position)
+                    for word in set(WORD.findall(message)):
+                        if word not in postings:
+                            postings[word] = array("l")
+                        postings[word].append(position)
+                self._indexed = last
+            finally:
+                self._lock.release()
+
+    def stop(self):
+        """
+            Makes a running update() return after the current batch of
+            messages, and the next ones return at once (when gitbuster is
+            closed).
+        """
+        self._stopped = True
+
+    def search(self, text):
+        """
+            Returns the set of the positions of the indexed messages
+            containing the given text, which must be made of word characters
+            (see is_word). Like a QRegExp, the search is case sensitive and
+            the text can be found anywhere in a word: the words containing
+            it are looked up in the index.
+        """
+        self._lock.acquire()
+        try:
+            key = (text, self._indexed)
+            if self._last_search is not None and self._last_search[0] == key:
+                return self._last_search[1]
+
+            positions = set()
+            for word, word_postings in self._postings.iteritems():
+                if text in word:
+                    positions.update(word_postings)
+            self._last_search = (key, positions)
+            return positions
+        finally:
+            self._lock.release()
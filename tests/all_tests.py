@@ -1,6 +1,11 @@
 from tests_q_git_model import TestsQGitModel
 from tests_rebase_tab import TestsRebaseTab
 from tests_confirm_dialog import TestsConfirmDialog
+from tests_history_loader import TestsHistoryLoader
+from tests_commit_cache import TestsCommitCache
+from tests_word_index import TestsWordIndex
+from tests_trigram_index import TestsTrigramIndex
+from tests_live_filter import TestsLiveFilter
 
 to_test = TestsQGitModel()
 to_test.setup_class()
@@ -18,6 +23,7 @@ to_test.test_parent()
 to_test.test_set_branch_twice_fails()
 to_test.test_filter_message()
 to_test.test_filter_author()
+to_test.test_match_rows()
 
 
 to_test = TestsRebaseTab()
@@ -28,3 +34,28 @@ to_test.all_tests()
 to_test = TestsConfirmDialog()
 to_test.setup_class()
 to_test.all_tests()
+
+
+to_test = TestsHistoryLoader()
+to_test.setup_class()
+to_test.all_tests()
+
+
+to_test = TestsCommitCache()
+to_test.setup_class()
+to_test.all_tests()
+
+
+to_test = TestsWordIndex()
+to_test.setup_class()
+to_test.all_tests()
+
+
+to_test = TestsTrigramIndex()
+to_test.setup_class()
+to_test.all_tests()
+
+
+to_test = TestsLiveFilter()
+to_test.setup_class()
+to_test.all_tests()
@@ -0,0 +1,50 @@
+"""
+    This script measures the time between the start of gitbuster and the
+    first paint of its main window, on a given repository.
+
+    Usage: python startup_benchmark.py [repository] [runs] [gitbuster options]
+"""
+from subprocess import Popen, PIPE
+import os
+import sys
+
+# See gitbuster.util.STARTUP_BENCHMARK
+STARTUP_BENCHMARK = "GITBUSTER_STARTUP_BENCHMARK"
+
+
+def measure(directory, options):
+    """
+        Starts gitbuster and returns the time it took to display the main
+        window, in seconds.
+    """
+    env = dict(os.environ)
+    env[STARTUP_BENCHMARK] = "1"
+    command = [sys.executable, "-c", "from gitbuster import main; main()",
+               directory] + options
+    handle = Popen(command, env=env, stdout=PIPE)
+    output = handle.communicate()[0]
+
+    for line in output.splitlines():
+        if line.startswith("First paint: ") and line.endswith(" seconds"):
+            return float(line.split()[2])
+    return None
+
+
+if __name__ == "__main__":
+    directory = len(sys.argv) > 1 and sys.argv[1] or "."
+    runs = len(sys.argv) > 2 and int(sys.argv[2]) or 5
+    options = sys.argv[3:]
+
+    timings = []
+    for run in xrange(runs):
+        timing = measure(directory, options)
+        if timing is None:
+            print "Run %d: the startup time couldn't be measured." % run
+        else:
+            print "Run %d: %.3f seconds" % (run, timing)
+            timings.append(timing)
+
+    if timings:
+        timings.sort()
+        print "Best: %.3f seconds, median: %.3f seconds" % \
+              (timings[0], timings[len(timings) / 2])
@@ -0,0 +1,82 @@
+"""
+    This test script checks that the commits are read from the on-disk cache
+    when the repository is opened again, even after the cache was corrupted.
+"""
+from git import Repo
+from gitbuster import commit_store
+from gitbuster.commit_cache import CACHE_DIRECTORY, CACHE_FILE
+from gitbuster.history_loader import HistoryLoader
+
+from template_test import TemplateTest
+import os
+
+
+class TestsCommitCache(TemplateTest):
+
+    @classmethod
+    def setup_class(cls):
+        TemplateTest.setup_class()
+        cls.gen_fake_2()
+        os.chdir(cls.TEST_dir)
+        cls.cache_path = os.path.join(Repo(cls.TEST_dir).git_dir,
+                                      CACHE_DIRECTORY, CACHE_FILE)
+
+    def open_repository(self):
+        """
+            Loads the history of every branch with a new commit store, like
+            gitbuster does when it's launched, and returns the number of
+            commits read with git log.
+        """
+        commit_store._STORES.clear()
+        loader = HistoryLoader(self.TEST_dir)
+        read = []
+        log = loader._log
+
+        def counting_log(hexshas):
+            read.extend(hexshas)
+            return log(hexshas)
+
+        loader._log = counting_log
+        loader.load(Repo(self.TEST_dir).heads)
+        return len(read)
+
+    def corrupt_cache(self, tail):
+        """
+            Replaces the last 10 bytes of the cache file with the given tail.
+        """
+        cache_file = open(self.cache_path, "r+b")
+        try:
+            cache_file.seek(-10, os.SEEK_END)
+            cache_file.truncate()
+            cache_file.write(tail)
+        finally:
+            cache_file.close()
+
+    def test_cached_commits(self):
+        error = "The commits aren't read from the cache."
+        if os.path.exists(self.cache_path):
+            os.remove(self.cache_path)
+
+        assert self.open_repository() > 0, "The commits aren't read."
+        self.check(self.open_repository(), 0, error)
+
+    def test_corrupted_tail(self):
+        error = "The commits are read again after the cache was %s."
+        for tail, corruption in (("", "truncated"),
+                                 ("not a pickle", "corrupted")):
+            self.corrupt_cache(tail)
+            assert self.open_repository() > 0, "The cache wasn't corrupted."
+            size = os.path.getsize(self.cache_path)
+
+            self.check(self.open_repository(), 0, error % corruption)
+            self.check(os.path.getsize(self.cache_path), size,
+                       "The cache file grew after it was %s." % corruption)
+
+    def all_tests(self):
+        self.test_cached_commits()
+        self.test_corrupted_tail()
+
+if __name__ == "__main__":
+    to_test = TestsCommitCache()
+    to_test.setup_class()
+    to_test.all_tests()
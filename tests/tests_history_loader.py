@@ -0,0 +1,129 @@
+"""
+    This test script checks that the models filled by the HistoryLoader are
+    the same as the models populated by GitModel.
+"""
+from PyQt4.QtCore import Qt, QRegExp
+from gitbuster.q_git_model import QGitModel
+from gitbuster.history_loader import HistoryLoader
+
+from template_test import TemplateTest
+import os
+
+
+class TestsHistoryLoader(TemplateTest):
+
+    @classmethod
+    def setup_class(cls):
+        TemplateTest.setup_class()
+        cls.gen_fake_2()
+        os.chdir(cls.TEST_dir)
+        cls.set_test_values()
+
+        branches = (cls.TEST_master_branch, cls.TEST_wallace_branch)
+        cls.loader = HistoryLoader(cls.TEST_dir)
+        cls.loader.load(branches)
+
+        cls.loaded_models = {}
+        for branch in branches:
+            model = QGitModel(cls.TEST_dir)
+            model.set_current_branch(branch)
+            model.populate(cls.loader)
+            cls.loaded_models[branch.name] = model
+
+    def test_row_count(self):
+        error = "The loaded %s model doesn't contain the right number of rows."
+        for model in (self.TEST_master_branch_model,
+                      self.TEST_wallace_branch_model):
+            name = model.get_current_branch().name
+            self.check(self.loaded_models[name].rowCount(), model.rowCount(),
+                       error % name)
+
+    def test_data(self):
+        error = "The loaded %s model doesn't have the right %s at row %d."
+        for model in (self.TEST_master_branch_model,
+                      self.TEST_wallace_branch_model):
+            name = model.get_current_branch().name
+            loaded_model = self.loaded_models[name]
+            for row in xrange(model.rowCount()):
+                for column, field in enumerate(model.get_columns()):
+                    index = model.createIndex(row, column)
+                    loaded_index = loaded_model.createIndex(row, column)
+                    self.check(
+                        loaded_model.data(loaded_index,
+                                          Qt.DisplayRole).toString(),
+                        model.data(index, Qt.DisplayRole).toString(),
+                        error % (name, field, row))
+
+    def test_shared_commits(self):
+        error = "The initial commit isn't shared by the loaded models."
+        master_commits = self.loaded_models["master"].get_git_model()\
+                                                     .get_commits()
+        wallace_commits = self.loaded_models["wallace_branch"].get_git_model()\
+                                                              .get_commits()
+        assert master_commits[-1] is wallace_commits[-1], error
+
+    def test_shared_actors(self):
+        error = "The same author is stored twice."
+        actors = {}
+        for model in self.loaded_models.values():
+            for commit in model.get_git_model().get_commits():
+                actor = commit.author
+                key = (actor.name, actor.email)
+                assert actors.setdefault(key, actor) is actor, error
+
+    def test_column_values(self):
+        error = "The %s column of the loaded %s model is wrong at row %d."
+        for model in (self.TEST_master_branch_model,
+                      self.TEST_wallace_branch_model):
+            name = model.get_current_branch().name
+            loaded_model = self.loaded_models[name]
+            last = model.rowCount() - 1
+            for field in ("authored_date", "committer_name", "message"):
+                column = model.get_columns().index(field)
+                values = loaded_model.column_values(field, 0, last)
+                for row, value in enumerate(values):
+                    expected = model.get_git_model().data(
+                                        model.createIndex(row, column))
+                    if field == "authored_date":
+                        expected = expected[0]
+                    self.check(value, expected, error % (field, name, row))
+
+    def test_indexed_filters(self):
+        error = "The indexed %s filter doesn't match row %d of %s."
+        filters = (("message", "message", ("rodney", "odn", "e", "rod.ey",
+                                           "ney$", "[0-9]")),
+                   ("nameEmail", "author_name", ("Wallace", "lace", "W.ll")),
+                   ("nameEmail", "committer_email", ("-wallace", "@")))
+        for model in (self.TEST_master_branch_model,
+                      self.TEST_wallace_branch_model):
+            name = model.get_current_branch().name
+            loaded_model = self.loaded_models[name]
+            store = loaded_model.get_git_model().get_commits()[0].get_store()
+            store.update_indexes()
+
+            last = model.rowCount() - 1
+            for model_filter, field, patterns in filters:
+                column = model.get_columns().index(field)
+                for pattern in patterns:
+                    model.filter_set(model_filter, QRegExp(pattern))
+                    loaded_model.filter_set(model_filter, QRegExp(pattern))
+                    scores = loaded_model.filter_scores(column, 0, last)
+                    expected = model.filter_scores(column, 0, last)
+                    for row in xrange(last + 1):
+                        self.check(scores[row], expected[row],
+                                   error % (model_filter, row, name))
+                model.filter_unset(model_filter)
+                loaded_model.filter_unset(model_filter)
+
+    def all_tests(self):
+        self.test_row_count()
+        self.test_data()
+        self.test_shared_commits()
+        self.test_shared_actors()
+        self.test_column_values()
+        self.test_indexed_filters()
+
+if __name__ == "__main__":
+    to_test = TestsHistoryLoader()
+    to_test.setup_class()
+    to_test.all_tests()
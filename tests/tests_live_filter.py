@@ -0,0 +1,64 @@
+"""
+    This test script checks when the filters applied while the user types
+    only have to match again the rows matched by the previous filters.
+"""
+from gitbuster.filter_main_class import filters_narrow
+
+
+class TestsLiveFilter:
+
+    @classmethod
+    def setup_class(cls):
+        cls.previous = {"message": u"rod", "nameEmail": u"Wallace",
+                        "afterWeekday": 1, "localOnly": None}
+
+    def with_values(self, **values):
+        """
+            Returns the previous filter values, updated with the given ones.
+        """
+        new_values = dict(self.previous)
+        new_values.update(values)
+        return new_values
+
+    def test_narrowing(self):
+        error = "The filters %r should narrow the previous ones."
+        for values in (self.with_values(),
+                       self.with_values(message=u"rodney"),
+                       self.with_values(message=u"rod rodney"),
+                       self.with_values(nameEmail=u"Wallace Groom"),
+                       self.with_values(message=u"rodney",
+                                        nameEmail=u"Wallace Groom")):
+            assert filters_narrow(self.previous, values), error % values
+
+    def test_not_narrowing(self):
+        error = "The filters %r shouldn't narrow the previous ones."
+        removed = self.with_values()
+        del removed["localOnly"]
+        added = self.with_values(beforeWeekday=4)
+        for values in (self.with_values(message=u"ro"),
+                       self.with_values(message=u"Rod"),
+                       self.with_values(message=u"rod."),
+                       self.with_values(message=u"rod|yen"),
+                       self.with_values(message=u"rodn?ey"),
+                       self.with_values(message=u"rod[n]"),
+                       self.with_values(message=u"^rod"),
+                       self.with_values(nameEmail=u"Wall"),
+                       self.with_values(afterWeekday=0),
+                       self.with_values(afterWeekday=2),
+                       removed,
+                       added):
+            assert not filters_narrow(self.previous, values), error % values
+
+    def test_first_filters(self):
+        assert not filters_narrow(None, self.previous), \
+               "The first filters can't narrow anything."
+
+    def all_tests(self):
+        self.test_narrowing()
+        self.test_not_narrowing()
+        self.test_first_filters()
+
+if __name__ == "__main__":
+    to_test = TestsLiveFilter()
+    to_test.setup_class()
+    to_test.all_tests()
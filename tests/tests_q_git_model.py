@@ -198,6 +198,22 @@ class TestsQGitModel(TemplateTest):
                 self.check(score_email, 0,
                            error_email % (row, author_email_column))
 
+    def test_match_rows(self):
+        dummy_model = QGitModel(self.TEST_dir)
+        dummy_model.set_current_branch(self.TEST_master_branch)
+        dummy_model.populate()
+        message = "rodney"
+        dummy_model.filter_set("message", QRegExp(message))
+
+        message_column = dummy_model.get_columns().index('message')
+        hexsha_column = dummy_model.get_columns().index('hexsha')
+        matches = dummy_model.match_rows([hexsha_column, message_column], 1,
+                                         xrange(dummy_model.rowCount()))
+
+        error = "On the master branch model, wrong match for row %d"
+        for row, commit in enumerate(self.TEST_master_branch_commits):
+            self.check(matches[row], message in commit[1], error % row)
+
     def all_tests(self):
         self.test_get_current_branch()
         self.test_default_branch()
@@ -213,6 +229,7 @@ class TestsQGitModel(TemplateTest):
         self.test_set_branch_twice_fails()
         self.test_filter_message()
         self.test_filter_author()
+        self.test_match_rows()
 
 if __name__ == "__main__":
     to_test = TestsQGitModel()
@@ -0,0 +1,153 @@
+"""
+    This test script checks that the literals found in the regexps are
+    contained by every matched text, and that the candidates found by the
+    TrigramIndex contain every matched text.
+"""
+from gitbuster.trigram_index import TrigramIndex, is_literal, \
+                                    pattern_literals, pattern_narrows, \
+                                    trigrams
+import re
+
+TEXTS = [u"Fix the rodney filter",
+         u"rodney_2 was here",
+         u"Add tests for Rodney (and rod).",
+         u"yendor",
+         u"the color and the colour",
+         u"foo.bar and foo-bar",
+         u"hello world, hello",
+         u"Abcd: aaab",
+         u"author-wallace@groom.com",
+         u"50% [done] {really}",
+         u"ro",
+         u"]def",
+         u"^def",
+         u""]
+PATTERNS = [u"rodney", u"odn", u"rod.ey", u"ney$", u"^rod", u"[0-9]",
+            u"colou?r", u"colou*r", u"a+b", u"fo+\\.bar", u"foo\\.bar",
+            u"\\bhello\\b", u"hel{2}o", u"\\x41bcd", u"(ro)dney",
+            u"(?:ro)dney", u"wal+ace@", u"\\[done\\]", u"50% \\[", u"rod|yen",
+            u"[rR]odney", u"d(ney)?", u"x*yendor", u"\\w+ney", u"e\\.?",
+            u"[]abc]def", u"[^]abc]def"]
+# The literals expected for some patterns.
+LITERALS = [(u"rodney", [u"rodney"]),
+            (u"rod.ey", [u"rod"]),
+            (u"ney$", [u"ney"]),
+            (u"[0-9]", []),
+            (u"colou?r", [u"colo"]),
+            (u"foo\\.bar", [u"foo.bar"]),
+            (u"\\bhello\\b", [u"hello"]),
+            # \xhhhh is one character for a QRegExp.
+            (u"\\x41bcd", []),
+            (u"\\x41 xyz", [u" xyz"]),
+            (u"(ro)dney", [u"dney"]),
+            (u"ab+cde", [u"cde"]),
+            (u"x{2,3}yzw", [u"yzw"]),
+            (u"rod|yen", []),
+            (u"50% \\[", [u"50% ["]),
+            # A leading "]" is a member of the character class.
+            (u"[]abc]def", [u"def"]),
+            (u"[^]abc]def", [u"def"])]
+
+
+class TestsTrigramIndex:
+
+    @classmethod
+    def setup_class(cls):
+        cls.texts = list(TEXTS)
+        cls.index = TrigramIndex(cls.texts.__len__, cls.texts.__getitem__)
+        cls.index.update()
+
+    def test_trigrams(self):
+        error = "Wrong trigrams for %r."
+        assert trigrams(u"abcd") == set([u"abc", u"bcd"]), error % u"abcd"
+        assert trigrams(u"aaaa") == set([u"aaa"]), error % u"aaaa"
+        assert trigrams(u"ab") == set(), error % u"ab"
+
+    def test_is_literal(self):
+        error = "is_literal(%r) should be %s."
+        for pattern in (u"rodney", u"rod ney", u"a-b", u"50%", u"@,:;"):
+            assert is_literal(pattern), error % (pattern, True)
+        for char in u"()[]{}.^$*+?|\\":
+            pattern = u"rod%sney" % char
+            assert not is_literal(pattern), error % (pattern, False)
+
+    def test_pattern_narrows(self):
+        error = "pattern_narrows(%r, %r) should be %s."
+        for previous, pattern in ((u"rod", u"rodney"), (u"odn", u"rodney"),
+                                  (u"rod", u"rod"), (u"", u"rod"),
+                                  (u"50%", u"50% done")):
+            assert pattern_narrows(previous, pattern), \
+                   error % (previous, pattern, True)
+        for previous, pattern in ((u"rodney", u"rod"), (u"rod", u"Rodney"),
+                                  (u"rod", u"rod."), (u"rod", u"rod|yen"),
+                                  (u"rod", u"rodn?"), (u"rod.", u"rod.e"),
+                                  (u"ro", u"ro[d]"), (u"rod", u"^rod")):
+            assert not pattern_narrows(previous, pattern), \
+                   error % (previous, pattern, False)
+
+    def test_pattern_literals(self):
+        error = "pattern_literals(%r) returns %r instead of %r."
+        for pattern, expected in LITERALS:
+            literals = pattern_literals(pattern)
+            assert literals == expected, error % (pattern, literals, expected)
+
+    def test_matched_texts_contain_literals(self):
+        error = "%r is matched by %r but doesn't contain %r."
+        for pattern in PATTERNS:
+            regexp = re.compile(pattern)
+            for text in self.texts:
+                if regexp.search(text):
+                    for literal in pattern_literals(pattern):
+                        assert literal in text, error % (text, pattern,
+                                                         literal)
+
+    def test_candidates(self):
+        error = "%r is matched by %r but isn't a candidate."
+        for pattern in PATTERNS:
+            literals = pattern_literals(pattern)
+            if not literals:
+                continue
+
+            candidates, indexed = self.index.search(literals)
+            assert indexed == len(self.texts), "Some texts aren't indexed."
+            regexp = re.compile(pattern)
+            for position, text in enumerate(self.texts):
+                if regexp.search(text):
+                    assert position in candidates, error % (text, pattern)
+
+    def test_unknown_trigram(self):
+        candidates, indexed = self.index.search([u"zzz"])
+        assert not candidates, "A text without the trigram is a candidate."
+
+    def test_added_texts(self):
+        texts = list(TEXTS)
+        index = TrigramIndex(texts.__len__, texts.__getitem__)
+        index.update()
+        texts.append(u"Revert rodney")
+
+        assert index.is_outdated(), "The added text should be outdated."
+        candidates, indexed = index.search([u"rodney"])
+        assert indexed == len(TEXTS), \
+               "The added text shouldn't be indexed before update()."
+        assert len(TEXTS) not in candidates, \
+               "The added text shouldn't be a candidate before update()."
+
+        index.update()
+        candidates, indexed = index.search([u"rodney"])
+        assert indexed == len(texts), "The added text isn't indexed."
+        assert len(TEXTS) in candidates, "The added text isn't a candidate."
+
+    def all_tests(self):
+        self.test_trigrams()
+        self.test_is_literal()
+        self.test_pattern_narrows()
+        self.test_pattern_literals()
+        self.test_matched_texts_contain_literals()
+        self.test_candidates()
+        self.test_unknown_trigram()
+        self.test_added_texts()
+
+if __name__ == "__main__":
+    to_test = TestsTrigramIndex()
+    to_test.setup_class()
+    to_test.all_tests()
@@ -0,0 +1,111 @@
+"""
+    This test script checks that the WordIndex finds the messages containing
+    a text made of word characters, like a case sensitive QRegExp would.
+"""
+from gitbuster import word_index
+from gitbuster.commit_store import StringPool
+from gitbuster.word_index import WordIndex, is_word
+
+MESSAGES = [u"Fix the rodney filter",
+            u"rodney_2 was here",
+            u"Add tests\n\nfor Rodney (and rod).",
+            u"snake_case, CamelCase",
+            u"caf\xe9 cr\xe8me",
+            u"",
+            u"2011-05-01: release 0.2"]
+SEARCHED = [u"rodney", u"odn", u"Rodney", u"rod", u"case", u"Case", u"e",
+            u"_2", u"2011", u"01", u"caf\xe9", u"\xe8", u"missing"]
+
+
+class TestsWordIndex:
+
+    @classmethod
+    def setup_class(cls):
+        cls.messages = StringPool()
+        for message in MESSAGES:
+            cls.messages.append(message)
+
+    def expected(self, text):
+        """
+            Returns the positions of the messages containing the text.
+        """
+        return set(position for position in xrange(len(self.messages))
+                   if text in self.messages.get(position))
+
+    def test_is_word(self):
+        error = "is_word(%r) should be %s."
+        for text in (u"rodney", u"snake_case", u"caf\xe9", u"42", u"_"):
+            assert is_word(text), error % (text, True)
+        for text in (u"", u"rod ney", u"rod.", u"a-b", u"ney$", u"[0-9]",
+                     u"rod\n"):
+            assert not is_word(text), error % (text, False)
+
+    def test_update(self):
+        index = WordIndex(self.messages)
+        assert index.is_outdated(), "A new index shouldn't be up to date."
+        assert not index.search(u"rodney"), \
+               "The messages shouldn't be found before they're indexed."
+
+        index.update()
+        assert not index.is_outdated(), "The index isn't up to date."
+        assert index.indexed_count() == len(self.messages), \
+               "Some messages aren't indexed."
+
+    def test_batches(self):
+        error = "The index updated in batches doesn't find %r."
+        update_batch = word_index.UPDATE_BATCH
+        word_index.UPDATE_BATCH = 2
+        try:
+            index = WordIndex(self.messages)
+            index.update()
+        finally:
+            word_index.UPDATE_BATCH = update_batch
+
+        for text in SEARCHED:
+            assert index.search(text) == self.expected(text), error % text
+
+    def test_search(self):
+        error = "The index doesn't find the messages containing %r."
+        index = WordIndex(self.messages)
+        index.update()
+        for text in SEARCHED:
+            assert index.search(text) == self.expected(text), error % text
+            # The second search is cached.
+            assert index.search(text) == self.expected(text), error % text
+
+    def test_added_messages(self):
+        error = "The message added to the pool isn't found once indexed."
+        messages = StringPool()
+        for message in MESSAGES:
+            messages.append(message)
+        index = WordIndex(messages)
+        index.update()
+        before = index.search(u"rodney")
+
+        position = messages.append(u"Revert rodney")
+        assert index.is_outdated(), "The added message should be outdated."
+        assert index.search(u"rodney") == before, \
+               "The added message shouldn't be found before it's indexed."
+
+        index.update()
+        assert index.search(u"rodney") == before | set([position]), error
+
+    def test_stop(self):
+        index = WordIndex(self.messages)
+        index.stop()
+        index.update()
+        assert index.indexed_count() == 0, \
+               "The messages are indexed after the index was stopped."
+
+    def all_tests(self):
+        self.test_is_word()
+        self.test_update()
+        self.test_batches()
+        self.test_search()
+        self.test_added_messages()
+        self.test_stop()
+
+if __name__ == "__main__":
+    to_test = TestsWordIndex()
+    to_test.setup_class()
+    to_test.all_tests()